@@ -34,5 +34,11 @@ setup(
         'pandas',
         'selenium',
     ],    
+    extras_require={
+        'parquet': ['pyarrow>=14'],
+        'async': ['httpx[http2]'],
+        'psutil': ['psutil'],
+        'html': ['selectolax>=0.3.5'],
+    },
     license='BSD-3',    
 )
\ No newline at end of file
@@ -0,0 +1,1074 @@
+import copy
+import functools
+import tempfile
+import threading
+import time
+import os
+import urllib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import requests
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.common.action_chains import ActionChains
+
+from .capture import get_capture
+from .drivers import DriverPool, new_driver, quit_driver
+from .governor import get_governor, DEFAULT_STORE_BUDGET
+from .manifest import Manifest
+from .pages import fetch_page, RenderingRequired
+from .extract import Field, extract, extracted
+from .waits import Timeout, wait_for, element, elements, click, any_of
+
+
+BACKENDS = ('selenium', 'http')
+
+# Columns of `GroceryHelpersAPI.normalize_search`.
+SEARCH_COLUMNS = ['sku', 'name', 'price', 'unit_price', 'link']
+
+# How long to wait for the pickup-slot carousel to show the next page before
+# deciding it's on its last one (seconds).
+PAGE_TURN_TIMEOUT = 2
+
+
+class NoSearchResults(Exception):
+    pass
+
+
+def parse_unit_price(quantity):
+    # The unit price and its basis ('ea' or 'kg') from an order's quantity
+    # text, e.g. '2 @ $3.49 ea' -> (3.49, 'ea'), or (None, None).
+    try:
+        unit_price = quantity.split(' @ ')[1]
+    except IndexError:
+        return None, None
+    if unit_price.endswith(' ea'):
+        return float(unit_price[1:-3]), 'ea'
+    elif unit_price.endswith(' /kg'):
+        return float(unit_price[1:-4]), 'kg'
+    return None, None
+
+
+def order_details_loaded(page):
+    # Every product on an order details page has its description, SKU,
+    # quantity and price rendered.
+    columns = [page[field] for field in ('descriptions', 'skus',
+                                         'quantities', 'prices')]
+    return (len(columns[0]) > 0 and
+            all(len(column) == len(columns[0]) for column in columns))
+
+
+def setup_and_teardown_driver(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            self = args[0]
+            if self._driver:
+                return func(*args, **kwargs)
+
+            self._open_driver()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.close_driver()
+        return wrapper
+
+    
+class GroceryHelpersAPI:
+    # What each page type's scraper reads, in one round trip (see
+    # `extract.Field`).
+    SEARCH_PAGE = {
+        'items': Field('.product-tile-group__list__item', many=True, fields={
+            'product': Field('.product-tracking',
+                             attr='data-track-products-array', json=True),
+            'eyebrow': Field('.product-tile__eyebrow'),
+            'link': Field('.product-tile__details__info__name__link',
+                          attr='href'),
+            'unitPrices': Field('ul li', many=True, fields={
+                'spans': Field('span', many=True),
+            }),
+        }),
+        'noResults': Field('.search-no-results__section-title'),
+    }
+
+    PRODUCT_FIELDS = {
+        'product': Field(attr='data-track-products-array', json=True),
+        'packageSize': Field('.product-name__item--package-size'),
+        'averageWeight': Field('.product-avarage-weight--product-details-page'),
+        'unitPrice': Field('.comparison-price-list__item', many=True),
+    }
+
+    PAST_ORDERS_PAGE = {
+        'links': Field('.account-order-history-past-orders-delivery-list-item',
+                       attr='href', many=True),
+        'dates': Field(
+            '.account-order-history-past-orders-delivery-list-item__details__date',
+            many=True),
+        'prices': Field(
+            '.account-order-history-past-orders-delivery-list-item__price',
+            many=True),
+    }
+
+    ORDER_DETAILS_PAGE = {
+        'descriptions': Field(
+            '.order-history-details-products__product__info__name', many=True),
+        'skus': Field(
+            '.order-history-details-products__product__info__code', many=True),
+        'quantities': Field(
+            '.order-history-details-products__product__quantity', many=True),
+        'prices': Field(
+            '.order-history-details-products__product__price', many=True),
+    }
+
+    PICKUP_LOCATIONS_PAGE = {
+        'rows': Field('.location-list-item-details', many=True),
+        'distances': Field('.location-list-item-type__type__distance',
+                           many=True),
+    }
+
+    PICKUP_SLOTS_PAGE = {
+        'times': Field('.timeslot-selector-timelist__time__text', many=True),
+        'days': Field('.timeslot-selector-daylist__day', many=True),
+    }
+
+    def __init__(self, user=None, password=None, user_data_dir=None,
+                 data_directory=os.path.join('.', 'data'),
+                 base_url='https://www.realcanadiansuperstore.ca',
+                 store_name='Real Canadian Superstore', governor=None,
+                 driver_pool=None, recycle=None, backend='selenium'):
+        # `backend='http'` fetches search and product pages without a
+        # browser, falling back to Selenium for pages that need rendering.
+        if backend not in BACKENDS:
+            raise ValueError('backend must be one of %s' % (BACKENDS,))
+        self._backend = backend
+        self._local = threading.local()
+        self._driver_pool = driver_pool
+        self._recycle = recycle or getattr(driver_pool, 'recycle', None)
+        self._headless = False
+        self._lean = False
+        self._capture = False
+        self._user = user
+        self._password = password
+        self._driver = None
+        self._invoice_list = None
+        self._temp_download_dir = tempfile.mkdtemp()
+        self._user_data_dir = user_data_dir
+        self._data_directory = os.path.join(data_directory,
+                                            store_name)
+        self._store_name = store_name
+        self._base_url = base_url
+        self._manifest = Manifest(data_directory)
+        self._governor = governor or get_governor()
+        self._governor.set_budget(base_url, *DEFAULT_STORE_BUDGET,
+                                  overwrite=False)
+
+    @property
+    def store_name(self):
+        return self._store_name
+
+    @property
+    def _driver(self):
+        # Each thread has its own driver, so one instance can serve several
+        # threads from a shared driver pool. (No `_local` yet if the
+        # constructor raised, e.g. on a bad `backend`.)
+        return getattr(getattr(self, '_local', None), 'driver', None)
+
+    @_driver.setter
+    def _driver(self, driver):
+        self._local.driver = driver
+
+    def __enter__(self):
+        # Keep one browser for every call made inside the `with` block.
+        if not self._driver:
+            self._open_driver()
+        return self
+
+    def __exit__(self, *args):
+        self.close_driver()
+
+    def __del__(self):
+        self.close_driver()
+        
+    def init_driver(self, headless=None, lean=False, capture=False):
+        # `lean=True` blocks images, fonts, media and trackers and is
+        # headless unless `headless=False`. `capture=True` records the JSON
+        # each page fetches (see `capture.get_capture`).
+        if headless is None:
+            headless = lean
+        self._headless = headless
+        self._lean = lean
+        self._capture = capture
+        self._driver = new_driver(headless, self._user_data_dir, lean,
+                                  capture)
+
+    def _open_driver(self):
+        # Borrow a warm driver from the pool if there is one, otherwise
+        # start a browser.
+        if self._driver_pool:
+            self._driver = self._driver_pool.checkout()
+        else:
+            self.init_driver(self._headless, self._lean, self._capture)
+
+    def close_driver(self):
+        if self._driver:
+            if self._driver_pool:
+                self._driver_pool.checkin(self._driver)
+            else:
+                quit_driver(self._driver)
+            self._driver = None
+
+    def _recycle_driver(self):
+        # Swap the current browser for a fresh one. Without a user data
+        # directory this also drops the session's cookies.
+        if self._driver_pool:
+            self._driver_pool.discard(self._driver)
+            self._driver = self._driver_pool.checkout()
+        else:
+            quit_driver(self._driver)
+            self.init_driver(self._headless, self._lean, self._capture)
+
+    def _get(self, url):
+        if self._recycle and self._recycle.expired(self._driver):
+            self._recycle_driver()
+
+        # Only keep the JSON fetched by the page we're loading.
+        network = get_capture(self._driver)
+        if network:
+            network.clear()
+
+        # Load a page, staying within the governor's budget for the site.
+        with self._governor.request(url):
+            self._driver.get(url)
+
+        if self._recycle:
+            self._recycle.page_loaded(self._driver)
+
+    def _fetch_page(self, url, fields, ready, timeout):
+        # The page over HTTP, or None if it has to go through a browser.
+        if self._backend != 'http':
+            return None
+        try:
+            return fetch_page(url, fields, ready, timeout,
+                              governor=self._governor)
+        except (RenderingRequired, requests.RequestException):
+            # Also covers bot walls (e.g., a 403) that a browser gets past.
+            return None
+
+    def search(self, term, timeout=10, follow_first_link=False):
+        url = '%s/search?search-bar=%s' % (self._base_url, term)
+        ready = lambda page: page['items'] or page['noResults']
+
+        page = None
+        if not follow_first_link:
+            page = self._fetch_page(url, self.SEARCH_PAGE, ready, timeout)
+        if page is None:
+            return self._browser_search(url, ready, timeout, follow_first_link)
+        return self._search_results(page)
+
+    def iter_search_many(self, terms, workers=4, timeout=10, timings=None,
+                         errors=None):
+        # Search for several terms at once, one browser per worker thread,
+        # yielding (term, DataFrame) as each search finishes. Browsers come
+        # from the API's driver pool, or from a temporary pool of `workers`
+        # browsers if it has none. Terms without results give an empty
+        # frame, and so do terms whose search fails (e.g., times out), so
+        # one bad term doesn't stop the rest. If `timings` is a dict, each
+        # term's search time (seconds) is stored in it; if `errors` is, each
+        # failed term's exception is.
+        terms = list(dict.fromkeys(terms))
+        pool = self._driver_pool
+        if pool is None:
+            pool = DriverPool(size=workers, headless=self._headless,
+                              lean=self._lean, capture=self._capture)
+
+        # A copy with its own per-thread drivers, drawn from `pool`.
+        worker = copy.copy(self)
+        worker._local = threading.local()
+        worker._driver_pool = pool
+
+        def search(term):
+            start = time.perf_counter()
+            try:
+                return worker.search(term, timeout)
+            except NoSearchResults:
+                return pd.DataFrame()
+            except Exception as e:
+                if errors is not None:
+                    errors[term] = e
+                return pd.DataFrame()
+            finally:
+                if timings is not None:
+                    timings[term] = time.perf_counter() - start
+
+        executor = ThreadPoolExecutor(max_workers=max(1, min(len(terms),
+                                                             workers)))
+        futures = {executor.submit(search, term): term for term in terms}
+        try:
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            # If the caller stops early, don't run the searches left over.
+            for future in futures:
+                future.cancel()
+            executor.shutdown()
+            if pool is not self._driver_pool:
+                pool.close()
+
+    def search_many(self, terms, workers=4, timeout=10):
+        # `iter_search_many` as one frame, in the order of `terms`, with a
+        # 'term' column saying which search each row came from.
+        results = dict(self.iter_search_many(terms, workers, timeout))
+        frames = [results[term].assign(term=term)
+                  for term in dict.fromkeys(terms)]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def normalize_search(self, df):
+        # A `search` result as the columns every store shares: sku, name,
+        # price (a float), unit_price (text) and link.
+        if len(df) == 0:
+            return pd.DataFrame(columns=SEARCH_COLUMNS)
+        return pd.DataFrame({
+            'sku': df['productSKU'],
+            'name': df['productName'],
+            'price': pd.to_numeric(df['productPrice'], errors='coerce'),
+            'unit_price': [', '.join('%s/%s' % x for x in unit_price)
+                           for unit_price in df['unitPrice']],
+            'link': df['link'],
+        }, columns=SEARCH_COLUMNS)
+
+    @setup_and_teardown_driver
+    def _browser_search(self, url, ready, timeout, follow_first_link):
+        self._get(url)
+
+        page = wait_for(self._driver, extracted(self.SEARCH_PAGE, ready),
+                        timeout, '%s not loaded after %s s' % (url, timeout))
+        df = self._search_results(page)
+
+        if follow_first_link:
+            self._get(df['link'].iloc[0])
+
+        return df
+
+    def _search_results(self, page):
+        if not page['items']:
+            raise NoSearchResults
+        items = page['items']
+
+        df = pd.DataFrame()
+        for field in ['productSKU', 'productName', 'productBrand',
+                     'productCatalog', 'productVendor', 'productPrice',
+                     'productQuantity', 'dealBadge', 'loyaltyBadge',
+                     'textBadge', 'productPosition', 'productOrderId',
+                     'productVariant']:
+            df[field] = [item['product'][0][field] for item in items]
+
+        df['previouslyPurchased'] = ['Previously Purchased' in
+                                     (item['eyebrow'] or '') for item in items]
+        df['link'] = [item['link'] for item in items]
+        df['categories'] = [urllib.request.unquote(link).replace('-', ' '). \
+                            split('/')[4:-2] for link in df['link']]
+        
+        unit_price_list = []
+
+        for item in items:
+            unit_price = []
+            for li in item['unitPrices']:
+                data = li['spans']
+                if len(data) == 5 and data[-1] == 'ea' and data[2] == '(est.)' and data[3] == '(est.)':
+                    price = data[1]
+                    quantity = data[4]
+                elif len(data) == 3:
+                    price = data[1]
+                    quantity = data[2]
+                else:
+                    continue
+                unit_price.append((price, quantity))
+            unit_price_list.append(unit_price)
+
+        df['unitPrice'] = unit_price_list
+
+        return df
+
+    def _product_page(self, link):
+        sku = link.split('/')[-1]
+        return {
+            'div': Field('.product-tracking[data-track-product-id="%s"]' % sku,
+                         fields=self.PRODUCT_FIELDS),
+        }
+
+    def get_product_info(self, link=None, timeout=10):
+        page = None
+        if link:
+            page = self._fetch_page(link, self._product_page(link),
+                                    lambda page: page['div'], timeout)
+        if page is None:
+            return self._browser_product_info(link, timeout)
+        return self._product_info(link, page['div'])
+
+    @setup_and_teardown_driver
+    def _browser_product_info(self, link=None, timeout=10):
+        if link and self._driver.current_url != link:
+            self._get(link)
+        elif link is None:
+            link = self._driver.current_url
+
+        page = wait_for(self._driver, extracted(
+            self._product_page(link), lambda page: page['div']), timeout)
+        return self._product_info(link, page['div'])
+
+    def _product_info(self, link, div):
+        product_data = div['product'][0]
+        product_data['link'] = link
+        product_data['categories'] = urllib.request.unquote(link).replace('-', ' ').split('/')[4:-2]
+        product_data['packageSize'] = div['packageSize']
+        product_data['averageWeight'] = div['averageWeight']
+        product_data['unitPrice'] = div['unitPrice']
+
+        return product_data
+
+    @setup_and_teardown_driver
+    def add_product_to_current_order(self, link, quantity=1, timeout=10):
+        self._get(link)
+        self._driver.execute_script("window.scrollTo(0, 0);")
+        
+        wait_for(self._driver, element('product-details-page-details'), timeout)
+
+        # If we've already added this item to the order, clear it
+        try:
+            input_box = self._driver.find_element_by_class_name('quantity-selector__quantity__input')
+            input_box.click()
+            ActionChains(self._driver).key_down(Keys.LEFT_CONTROL).send_keys('a').key_up(Keys.LEFT_CONTROL).perform()
+            input_box.send_keys(0)
+            input_box.send_keys(Keys.ENTER)
+        except NoSuchElementException:
+            pass        
+        
+        wait_for(self._driver, click(
+            (By.CSS_SELECTOR, "button[data-track='productAddToCartButton']")),
+            timeout)
+
+        input_box = wait_for(self._driver,
+                             element('quantity-selector__quantity__input'),
+                             timeout)
+        input_box.click()
+        ActionChains(self._driver).key_down(Keys.LEFT_CONTROL).send_keys('a').key_up(Keys.LEFT_CONTROL).perform()
+        input_box.send_keys(quantity)
+        input_box.send_keys(Keys.ENTER)
+        
+    @setup_and_teardown_driver
+    def get_past_orders_list(self, timeout=10):
+        self._get(self._base_url + '/account/order-history')
+
+        # An account without past orders never shows the list.
+        try:
+            page = wait_for(self._driver, extracted(
+                self.PAST_ORDERS_PAGE, lambda page: page['links']), timeout)
+        except Timeout:
+            page = extract(self._driver, self.PAST_ORDERS_PAGE)
+
+        dates = page['dates']
+        prices = page['prices']
+        links = page['links']
+        order_numbers = [link.split('/')[-1] for link in links]
+        
+        df_orders = pd.DataFrame({'date': dates,
+                                  'price': prices,
+                                  'link': links,
+                                  'orderNumber': order_numbers})
+        return df_orders
+
+    @setup_and_teardown_driver
+    def get_itemized_order_history(self, timeout=10):
+        df_orders = self.get_past_orders_list(timeout)
+        
+        orders_path = os.path.join(self._data_directory, 'orders.csv')
+
+        if os.path.exists(orders_path):
+            df = pd.read_csv(orders_path, index_col=0)
+        else:
+            df = pd.DataFrame()
+        
+        for i, link in enumerate(df_orders['link']):
+            order_number = link.split('/')[-1]
+            
+            # skip if we've already downloaded this order
+            if self._manifest.get('order', order_number, self._store_name):
+                continue
+            
+            self._get(link)
+
+            page = wait_for(self._driver, extracted(
+                self.ORDER_DETAILS_PAGE, order_details_loaded), timeout)
+
+            product_descriptions = page['descriptions']
+            product_skus = page['skus']
+            product_prices = [float(product_price[1:])
+                              for product_price in page['prices']]
+            unit_prices = [parse_unit_price(quantity)
+                           for quantity in page['quantities']]
+            
+            df_products = self.get_product_list()
+            
+            # add any new products to the products database
+            for sku in product_skus:
+                if len(df_products) == 0 or sku not in df_products.index:
+                    try:
+                        link = self.map_sku_to_link(sku)
+                        self.add_product_to_database(link)
+                    except NoSearchResults:
+                        print("Couldn't find sku: %s" % sku)
+            
+            # Convert quantity field to units / kg
+            units_list = []
+            kg_list = []
+            for j, (unit_price, basis) in enumerate(unit_prices):
+                units = None
+                kg = None
+                try:
+                    if basis == 'ea':
+                        units =  product_prices[j] / unit_price
+                        kg = units * df_products[product_skus[j] == df_products.index]['kg'].values[0]
+                    elif basis == 'kg':
+                        kg = product_prices[j] / unit_price
+                except IndexError:
+                    pass
+                units_list.append(units)
+                kg_list.append(kg)
+
+            df = df.append(pd.DataFrame({'description': product_descriptions,
+                                         'productSKU': product_skus,
+                                         'quantity': units_list,
+                                         'kg': kg_list,
+                                         'price': product_prices,
+                                         'orderNumber': order_number,
+                                         'date': df_orders['date'].values[i]}
+            ), ignore_index=True)
+            
+            # update the orders database
+            df.to_csv(orders_path)
+            self._manifest.add('order', order_number, orders_path,
+                               store=self._store_name,
+                               valid_from=df_orders['date'].values[i],
+                               valid_to=df_orders['date'].values[i],
+                               rows=len(product_skus))
+            
+        return df    
+
+    @setup_and_teardown_driver
+    def map_sku_to_link(self, sku, follow_link=True):
+        # note errors with 100% maple syrup, 2% cottage cheese
+        result = self.search(sku[:-3], follow_first_link=follow_link)
+        if len(result) == 1:
+            return result['link'].iloc[0]
+        else:
+            return None
+    
+    @setup_and_teardown_driver
+    def add_product_to_database(self, link):
+        products_path = os.path.join(self._data_directory, 'products', 'products.csv')
+
+        if os.path.exists(products_path):
+            df_products = pd.read_csv(products_path, index_col=0)
+        else:
+            df_products = pd.DataFrame()
+
+        try:
+            if np.isnan(link):
+                link = None
+        except TypeError:
+            pass
+
+        if len(df_products) and link in df_products['link'].values:
+            return
+
+        # Saving the page and its image needs it open in the browser.
+        product_info = self._browser_product_info(link)
+
+        output_path = os.path.join(self._data_directory, 'products', product_info['productSKU'])
+
+        if not os.path.exists(output_path):
+            os.makedirs(output_path)
+
+            with open(os.path.join(output_path, product_info['productName'] + '.html'), "wb") as f:
+                f.write(self._driver.page_source.encode('utf-8'))
+
+            src = self._driver.find_element_by_class_name('responsive-image--product-details-page').get_attribute('src')
+            ext = os.path.splitext(src)[1]
+            with self._governor.request(src):
+                urllib.request.urlretrieve(src, os.path.join(output_path, product_info['productName'] + ext))
+
+        data = {k: [v] for k, v in product_info.items()}
+        
+        def isnan(field):
+            if field is None:
+                return True
+            try:
+                return np.isnan(field)
+            except TypeError:
+                return False
+        
+        # Convert package size to weight (assume density of 1 kg/L for everything)
+        x = data['packageSize'][0]
+        kg = None
+        if not isnan(data['averageWeight'][0]):
+            kg = float(data['averageWeight'][0][18:-3])
+        elif isnan(x):
+            pass
+        elif x.endswith(' mL'):
+            kg = 1e-3 * float(x[:-3])
+        elif x.endswith(' L'):
+            kg = float(x[:-2])
+        elif x.endswith(' kg'):
+            kg = float(x[:-3])
+        elif x.endswith(' lb'):
+            kg = float(x[:-3]) / 2.2
+        elif x.endswith(' lb bag'):
+            kg = float(x[:-7]) / 2.2
+        elif x.endswith(' g'):
+            kg = 1e-3 * float(x[:-2])
+        data['kg'] = [kg]
+        
+        sku = data.pop('productSKU')[0]
+        df_products = df_products.append(pd.DataFrame(data, index=[sku]))
+        df_products.to_csv(products_path)
+        self._manifest.add('product', sku, output_path, store=self._store_name,
+                           rows=1)
+
+    @setup_and_teardown_driver
+    def get_pickup_locations(self, postal_code, timeout=10):
+        self._get(self._base_url + '/store-locator')
+
+        """
+        First character of the postal code	Province, territory or region	First character of the postal code	Province, territory or region
+        Note: The regions used in this table are defined by Canada Post Corporation.
+
+        Source: Statistics Canada, 2006 Census of Population.
+
+        A	Newfoundland and Labrador	M	Metropolitan Toronto
+        B	Nova Scotia	                N	Southwestern Ontario
+        C	Prince Edward Island	    P	Northern Ontario
+        E	New Brunswick	            R	Manitoba
+        G	Eastern Québec	            S	Saskatchewan
+        H	Metropolitan Montréal	    T	Alberta
+        J	Western Québec	            V	British Columbia
+        K	Eastern Ontario	            X	Northwest Territories and Nunavut
+        L	Central Ontario	            Y	Yukon Territory
+        """
+
+        if postal_code[0] in ['K', 'L', 'M', 'N', 'P']:
+            region = 'Ontario'
+
+        buttons = [button for button in self._driver.find_elements_by_class_name('primary-button--region-selector') if button.text == region]
+        if len(buttons):
+            buttons[0].click()
+        
+        def set_postal_code(driver):
+            postal_code_box = driver.find_element_by_class_name("location-search__search__input")
+            postal_code_box.click()
+            ActionChains(driver) \
+                .key_down(Keys.CONTROL) \
+                .send_keys('a') \
+                .key_up(Keys.CONTROL) \
+                .perform()
+            postal_code_box.send_keys(postal_code)
+            postal_code_box.send_keys(Keys.ENTER)
+            return True
+
+        wait_for(self._driver, set_postal_code, timeout)
+
+        page = wait_for(self._driver, extracted(
+            self.PICKUP_LOCATIONS_PAGE,
+            lambda page: page['rows'] and page['distances'] and
+            all(page['distances'])), timeout)
+        data = [row.split('\n')[:2] for row in page['rows']]
+
+        # transpose the 2d list
+        data = list(zip(*data))
+
+        # get the distance to each store
+        data.append(page['distances'])
+
+        df = pd.DataFrame(dict(zip(['name', 'address', 'distance'], data)))
+        return df
+
+    @setup_and_teardown_driver
+    def get_pickup_slots(self, postal_code, location=None, timeout=10):
+
+        def select_location(postal_code, location):
+            df_locations = self.get_pickup_locations(postal_code)
+
+            if location is None:
+                i = 0
+            elif location in df_locations['name'].values:
+                # Go to the store with the matching name
+                i = int(df_locations[df_locations['name'] == location].index.values[0])
+            else:
+                raise KeyError('%s not in %s' % (location,
+                    df_locations['name'].values.tolist()))
+
+            locations = wait_for(self._driver, elements('location-list__item'),
+                                 timeout)
+
+            css_selected = "button[data-track='storeLocatorShopNowResetButton']"
+            css_unselected = "button[data-track='storeLocatorShopNowButton']"
+
+            buttons = [loc.find_element_by_css_selector(css_unselected)
+                    if len(loc.find_elements_by_css_selector(css_unselected))
+                    else None for loc in locations]
+
+            if buttons[i]:
+                buttons[i].click()
+                wait_for(self._driver,
+                         click('store-locator-redirect__button'), timeout)
+
+        select_location(postal_code, location)
+
+        # Click the "select a timeslot" button
+        wait_for(self._driver, click(
+            (By.CSS_SELECTOR, "button[data-auid='timeslot-button']")), timeout)
+
+        def get_days(page):
+            return [', '.join(day.split('\n')[:2]) for day in page['days'] if len(day)]
+
+        def loaded(page):
+            return len(page['times']) and all(page['times'])
+
+        def get_pickup_table(page):
+            days = get_days(page)
+            time_slots = [day.split('\n')[2:] for day in page['days'] if len(day)]
+
+            return pd.DataFrame(dict(zip(days, time_slots)), index=page['times'])
+
+        page = wait_for(self._driver,
+                        extracted(self.PICKUP_SLOTS_PAGE, loaded), timeout)
+        df = get_pickup_table(page)
+
+        while True:
+            days = get_days(page)
+            # No next control (e.g., a single page of slots) means this is
+            # the last page.
+            if not self._driver.find_elements(By.CLASS_NAME, 'slick-next'):
+                break
+            try:
+                wait_for(self._driver, click('slick-next'), PAGE_TURN_TIMEOUT)
+            except Timeout:
+                break
+
+            # The carousel doesn't move once it's on its last page.
+            try:
+                page = wait_for(self._driver, extracted(
+                    self.PICKUP_SLOTS_PAGE,
+                    lambda page: loaded(page) and get_days(page) != days),
+                    PAGE_TURN_TIMEOUT)
+            except Timeout:
+                break
+            df_page = get_pickup_table(page)
+
+            if df_page.columns[-1] in df.columns.values:
+                break
+            
+            for col in df_page.columns:
+                if col not in df.columns.values:
+                    df[col] = df_page[col]
+
+        return df
+
+    def get_product_list(self):
+        products_path = os.path.join(self._data_directory, 'products', 'products.csv')
+        if os.path.exists(products_path):
+            return pd.read_csv(products_path, index_col=0)
+        else:
+            return pd.DataFrame()
+    
+    def _login(self, timeout=10):
+        if not self.signed_in(timeout):
+            wait_for(self._driver, element((By.ID, "accessCode")),
+                     timeout).send_keys(self._user)
+            self._driver.find_element_by_id ("password").send_keys(self._password)
+            self._driver.find_element_by_xpath('//*[@id="login-form"]/div[3]/button').click()
+        
+    def signed_in(self, timeout=10):
+        url = self._driver.current_url
+        
+        # If we're not on the base url or the pcid login page, go to the base
+        # url.
+        if url.find(self._base_url):
+            self._get(self._base_url)        
+
+        # If the sign in button exists, the user is not logged in; if the
+        # accounts button exists, they are.
+        found, _ = wait_for(self._driver, any_of(
+            signed_out=element('sign-in'),
+            signed_in=element('account__toggle__button')), timeout)
+        return found == 'signed_in'
+        
+
+class RealCanadianSuperstoreAPI(GroceryHelpersAPI):
+    def __init__(self, user=None, password=None, user_data_dir=None,
+                 data_directory=os.path.join('.', 'data'), governor=None,
+                 driver_pool=None, recycle=None, backend='selenium'):
+        super().__init__(user=user, password=password, user_data_dir=user_data_dir,
+                       data_directory=data_directory, governor=governor,
+                       driver_pool=driver_pool, recycle=recycle,
+                       backend=backend,
+                       base_url='https://www.realcanadiansuperstore.ca',
+                       store_name='Real Canadian Superstore')
+
+
+class LowblawsAPI(GroceryHelpersAPI):
+    def __init__(self, user=None, password=None, user_data_dir=None,
+                 data_directory=os.path.join('.', 'data'), governor=None,
+                 driver_pool=None, recycle=None, backend='selenium'):
+        super().__init__(user=user, password=password, user_data_dir=user_data_dir,
+                       data_directory=data_directory, governor=governor,
+                       driver_pool=driver_pool, recycle=recycle,
+                       backend=backend,
+                       base_url='https://www.loblaws.ca',
+                       store_name='Loblaws')
+
+        
+class ZehrsAPI(GroceryHelpersAPI):
+    def __init__(self, user=None, password=None, user_data_dir=None,
+                 data_directory=os.path.join('.', 'data'), governor=None,
+                 driver_pool=None, recycle=None, backend='selenium'):
+        super().__init__(user=user, password=password, user_data_dir=user_data_dir,
+                       data_directory=data_directory, governor=governor,
+                       driver_pool=driver_pool, recycle=recycle,
+                       backend=backend,
+                       base_url='https://www.zehrs.ca',
+                       store_name='Zehrs')
+
+        
+class ValumartAPI(GroceryHelpersAPI):
+    def __init__(self, user=None, password=None, user_data_dir=None,
+                 data_directory=os.path.join('.', 'data'), governor=None,
+                 driver_pool=None, recycle=None, backend='selenium'):
+        super().__init__(user=user, password=password, user_data_dir=user_data_dir,
+                       data_directory=data_directory, governor=governor,
+                       driver_pool=driver_pool, recycle=recycle,
+                       backend=backend,
+                       base_url='https://www.valumart.ca',
+                       store_name='Valu-mart')
+
+        
+class WalmartAPI(GroceryHelpersAPI):
+    SEARCH_PAGE = {
+        'descriptions': Field('.description', many=True),
+        'titles': Field('.title', many=True),
+        'priceUnits': Field('.price-unit', many=True),
+        'prices': Field('.price-current', many=True),
+        'skus': Field('.productSkus', attr='value', many=True, json=True),
+        'links': Field('.product-link', attr='data-bind', many=True),
+    }
+
+    PRODUCT_PAGE = {
+        'jsonData': Field("script[type='application/ld+json']",
+                          attr='innerHTML', many=True, json=True),
+        'ppu': Field("span[data-automation='buybox-price-ppu']"),
+    }
+
+    PICKUP_LOCATIONS_PAGE = {
+        'divs': Field("div[data-automation='pickup-location']", many=True),
+    }
+
+    PICKUP_SLOTS_PAGE = {
+        'rows': Field("table[aria-label='Select a time slot'] tr", many=True,
+                      fields={'th': Field('th', many=True),
+                              'td': Field('td', many=True)}),
+    }
+
+    def __init__(self, user=None, password=None, user_data_dir=None,
+                 data_directory=os.path.join('.', 'data'), governor=None,
+                 driver_pool=None, recycle=None):
+        super().__init__(user=user, password=password, user_data_dir=user_data_dir,
+                       data_directory=data_directory, governor=governor,
+                       driver_pool=driver_pool, recycle=recycle,
+                       base_url='https://www.walmart.ca',
+                       store_name='Walmart')
+
+    @setup_and_teardown_driver
+    def search(self, term, timeout=10, follow_first_link=False):
+        self._get('%s/search/%s' % (self._base_url, term))
+
+        page = extract(self._driver, self.SEARCH_PAGE)
+
+        descriptions = page['descriptions']
+        titles = page['titles'][:len(descriptions)]
+        price_units = page['priceUnits']
+
+        prices = [price.replace('\n', '') for price in page['prices']]
+        prices = [float(price[1:]) if price.find('¢') == -1 else float('0.%2d' % int(price[:-1])) for price in prices]
+
+        skus = [item['productid'] for item in page['skus']]
+
+        links = [self._base_url + link.split(',')[1][2:-3] for link in page['links']]
+
+        if follow_first_link and len(links):
+            self._get(links[0])
+        
+        df = pd.DataFrame({
+         'sku': skus, 
+         'title': titles,
+         'description': descriptions,
+         'unit_price': price_units,
+         'price': prices,
+         'link': links})
+
+        return df
+
+    def normalize_search(self, df):
+        if len(df) == 0:
+            return pd.DataFrame(columns=SEARCH_COLUMNS)
+        return pd.DataFrame({
+            'sku': df['sku'],
+            'name': df['title'],
+            'price': df['price'],
+            'unit_price': df['unit_price'],
+            'link': df['link'],
+        }, columns=SEARCH_COLUMNS)
+
+    @setup_and_teardown_driver
+    def get_product_info(self, link=None, timeout=10):
+        if link and self._driver.current_url != link:
+            self._get(link)
+        elif link is None:
+            link = self._driver.current_url
+
+        page = extract(self._driver, self.PRODUCT_PAGE)
+        json_data = page['jsonData']
+        product = [x for x in json_data if x['@type'] == 'Product'][0]
+        categories = [y['item']['name'] for y in
+                      [x for x in json_data if x['@type'] == 'BreadcrumbList'
+                      ][0]['itemListElement']][1:]
+        ppu = page['ppu']
+
+        product_ids = {}
+        div = self._driver.find_element_by_xpath("//*[contains(text(), 'Product Identifiers')]")
+        for i in range(3):
+            div = self._driver.execute_script("""
+                return arguments[0].nextElementSibling
+            """, div)
+            field, value = div.text.split('\n')
+            product_ids[field] = value
+
+        product_info = {
+            'name': product['name'],
+            'description': product['description'],
+            'brand': product['brand']['name'],
+            'price': product['offers']['price'],
+            'unit_price': ppu,
+            'categories': categories
+        }
+
+        product_info.update(product_ids)
+        
+        return product_info
+    
+    @setup_and_teardown_driver
+    def add_product_to_current_order(self, link, quantity=1, timeout=10):
+        self._get(link)
+
+        input_box = self._driver.find_element_by_css_selector("span[data-automation='quantity']").find_element_by_tag_name('input')
+        input_box.click()
+        ActionChains(self._driver).key_down(Keys.LEFT_CONTROL).send_keys('a').key_up(Keys.LEFT_CONTROL).perform()
+        input_box.send_keys(5)
+
+        self._driver.find_element_by_xpath("//button[contains(text(), 'Add to cart')]").click()
+
+    @setup_and_teardown_driver
+    def get_pickup_locations(self, postal_code, timeout=10):
+        self._get(self._base_url + '/en/scheduled-shopping')
+
+        def set_postal_code(postal_code):
+            #<input type="text" placeholder="Enter a city or postal code to find a pickup location near you." aria-label="Enter a city or postal code to find a pickup location near you." class="css-1kgtn0i eesbt950" value="N1R1A3">
+            postal_code_box = wait_for(self._driver, element(
+                (By.CSS_SELECTOR, "input[placeHolder='Enter a city or postal code to find a pickup location near you.']")),
+                timeout)
+            postal_code_box.click()
+            ActionChains(self._driver) \
+                .key_down(Keys.CONTROL) \
+                .send_keys('a') \
+                .key_up(Keys.CONTROL) \
+                .perform()
+            postal_code_box.send_keys(postal_code)
+
+            #<input aria-label="Find" type="submit" class="css-hrxt9j e1tmjuvc2" value="Find">
+            self._driver.find_element_by_css_selector("input[type='submit']").click()
+        
+        set_postal_code(postal_code)
+
+        page = wait_for(self._driver, extracted(
+            self.PICKUP_LOCATIONS_PAGE, lambda page: page['divs']), timeout)
+        data = [div.split('\n')[:4] for div in page['divs']]
+
+        # transpose the 2d list
+        data = list(zip(*data))
+
+        df = pd.DataFrame(dict(zip(['index', 'distance', 'name', 'address'], data)))
+        return df.set_index('index')
+
+    @setup_and_teardown_driver
+    def get_pickup_slots(self, postal_code, location=None, timeout=10):
+
+        def select_location(postal_code, location):
+            df_locations = self.get_pickup_locations(postal_code)
+
+            if location is None:
+                i = 0
+            elif location in df_locations['name'].values:
+                # Go to the store with the matching name
+                i = int(df_locations[df_locations['name'] == location].index.values[0]) - 1
+            else:
+                raise KeyError('%s not in %s' % (location,
+                    df_locations['name'].values.tolist()))
+
+            buttons = self._driver.find_elements_by_css_selector("button[data-automation='location-link']")
+            self._driver.execute_script('arguments[0].scrollIntoView(true);', buttons[i])
+
+            # Click on the selected store
+            buttons[i].click()
+        
+        select_location(postal_code, location)
+
+        def get_dates(page):
+            return page['rows'][0]['th'][1:] if page['rows'] else []
+
+        def get_pickup_table(page):
+            rows = page['rows']
+            data = [row['td'] for row in rows[1:]]
+
+            # Transpose the 2d list
+            data = list(zip(*data))
+
+            dates = get_dates(page)
+            times = [row['th'][0] for row in rows[1:]]
+            return pd.DataFrame(dict(zip(dates, data)), index=times)
+
+        page = wait_for(self._driver, extracted(self.PICKUP_SLOTS_PAGE,
+                                                get_dates), timeout)
+        df = get_pickup_table(page)
+
+        while True:
+            # A missing or disabled next button means this is the last page.
+            buttons = self._driver.find_elements(By.ID, "next-slots")
+            if not buttons or buttons[0].get_attribute('disabled'):
+                break
+            button = buttons[0]
+            dates = get_dates(page)
+            button.click()
+
+            # The table's header row (its dates) changes with the page.
+            page = wait_for(self._driver, extracted(
+                self.PICKUP_SLOTS_PAGE,
+                lambda page: get_dates(page) and get_dates(page) != dates),
+                timeout)
+            df_page = get_pickup_table(page)
+            for col in df_page.columns:
+                if col not in df.columns.values:
+                    df[col] = df_page[col]
+
+        return df
@@ -0,0 +1,107 @@
+import argparse
+import logging
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from .. import flyers
+from ..flipp_stub import FlippStubServer
+from ..governor import RateGovernor, get_governor, set_governor
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return float('nan')
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def benchmark(server, concurrency, merchant='Stand-in Grocer',
+              postal_code='N2H5M5'):
+    # Time one cold `get_flyers` (no item cache) against `server`.
+    latencies = []
+    scrape_item = flyers.scrape_item
+
+    def timed_scrape_item(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return scrape_item(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    governor = get_governor()
+    flyers.scrape_item = timed_scrape_item
+    with tempfile.TemporaryDirectory() as data_directory:
+        set_governor(RateGovernor(state_directory=data_directory,
+                                  max_concurrency=concurrency,
+                                  initial_concurrency=concurrency))
+        requests = server.requests
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            results = flyers.get_flyers(merchant, postal_code, data_directory,
+                                        max_workers=concurrency, cache=False)
+        finally:
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            flyers.scrape_item = scrape_item
+            set_governor(governor)
+
+    items = sum(len(df) for df in results)
+    return {
+        'concurrency': concurrency,
+        'items': items,
+        'requests': server.requests - requests,
+        'seconds': elapsed,
+        'items/s': items / elapsed,
+        'p50 ms': 1e3 * percentile(latencies, 50),
+        'p99 ms': 1e3 * percentile(latencies, 99),
+        'peak MB': peak / 2 ** 20,
+    }
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(
+        description='Measure get_flyers throughput against a local '
+        'stand-in for the Flipp backend.')
+
+    parser.add_argument('--concurrency', type=int, nargs='+',
+                        default=[1, 4, 16, 32],
+                        help='Worker counts to benchmark.')
+    parser.add_argument('--recordings', default=None,
+                        help='Directory of recorded responses (default: '
+                        'serve synthetic flyers).')
+    parser.add_argument('--merchant', default='Stand-in Grocer',
+                        help='Merchant to search for (must be recorded when '
+                        'using --recordings).')
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='Seconds added to every response.')
+    parser.add_argument('--jitter', type=float, default=0.02,
+                        help='Random +/- seconds added to the latency.')
+    parser.add_argument('--error_rate', type=float, default=0,
+                        help='Fraction of requests answered with a 503.')
+    parser.add_argument('--flyers', type=int, default=2,
+                        help='Number of synthetic flyers.')
+    parser.add_argument('--items_per_flyer', type=int, default=300,
+                        help='Number of items per synthetic flyer.')
+    parser.add_argument('--output', default=None,
+                        help='Also write the results to this CSV file.')
+    args = parser.parse_args()
+
+    with FlippStubServer(recordings=args.recordings, latency=args.latency,
+                         jitter=args.jitter, error_rate=args.error_rate,
+                         flyers=args.flyers,
+                         items_per_flyer=args.items_per_flyer,
+                         seed=0) as server:
+        flyers.set_backend_url(server.url)
+        df = pd.DataFrame([benchmark(server, concurrency, args.merchant)
+                           for concurrency in args.concurrency])
+
+    print(df.to_string(index=False, float_format='%.2f'))
+    if args.output:
+        df.to_csv(args.output, index=False)
@@ -0,0 +1,27 @@
+import argparse
+import logging
+import os
+
+from ..storage import compact_flyers
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--output_data_dir',
+                        default=os.environ.get('GH_OUTPUT_DATA_DIR'),
+                        help='Output data directory (default: '
+                        '`GH_OUTPUT_DATA_DIR` environment variable).')
+    parser.add_argument('--remove_csv', action='store_true',
+                        help='Delete each CSV flyer once it has been '
+                        'converted.')
+    args = parser.parse_args()
+
+    if args.output_data_dir == None:
+        args.output_data_dir = '.'
+
+    count = compact_flyers(args.output_data_dir, remove_csv=args.remove_csv)
+    print('Compacted %d flyers into %s' % (count, os.path.join(
+        args.output_data_dir, 'flyers')))
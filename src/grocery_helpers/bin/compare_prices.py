@@ -0,0 +1,39 @@
+import argparse
+import logging
+import os
+
+from ..compare import compare_prices, STORE_APIS
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('terms', nargs='+',
+                        help='Search terms or SKUs to compare.')
+    parser.add_argument('--workers', type=int, default=2,
+                        help='Browsers per store (default: 2).')
+    parser.add_argument('--timeout', type=float, default=10,
+                        help='Seconds to wait for each search (default: 10).')
+    parser.add_argument('--output_data_dir',
+                        default=os.environ.get('GH_OUTPUT_DATA_DIR'),
+                        help='Output data directory (default: '
+                        '`GH_OUTPUT_DATA_DIR` environment variable).')
+    parser.add_argument('--output', default=None,
+                        help='Also write the prices to this CSV file.')
+    args = parser.parse_args()
+
+    if args.output_data_dir == None:
+        args.output_data_dir = '.'
+
+    stores = [cls(data_directory=args.output_data_dir) for cls in STORE_APIS]
+    prices, stats = compare_prices(args.terms, stores, workers=args.workers,
+                                   timeout=args.timeout)
+    print(prices[['store', 'term', 'name', 'price',
+                  'unit_price']].to_string())
+    print()
+    print(stats.to_string())
+
+    if args.output:
+        prices.to_csv(args.output)
@@ -1,8 +1,9 @@
 import argparse
+import itertools
 import logging
 import os
 
-from ..flyers import get_flyers
+from ..flyers import get_flyers_many, MAX_WORKERS
 
 
 if __name__ == '__main__':
@@ -10,11 +11,14 @@ if __name__ == '__main__':
 
     parser = argparse.ArgumentParser()
 
-    parser.add_argument('--postal_code',
-                        default=os.environ.get('GH_POSTAL_CODE'),
-                        help='postal code (default: '
-                        '`GH_POSTAL_CODE` environment variable).')
-    parser.add_argument('store', choices=('Real Canadian Superstore', 'Walmart'))
+    parser.add_argument('--postal_code', action='append',
+                        help='postal code; repeat for several (default: '
+                        'whitespace-separated `GH_POSTAL_CODE` environment '
+                        'variable).')
+    parser.add_argument('store', nargs='+',
+                        choices=('Real Canadian Superstore', 'Walmart'),
+                        help='Download flyers for every combination of '
+                        'store and postal code.')
 
     parser.add_argument('--profile_dir',
                         default=os.environ.get('GH_PROFILE_DIR'),
@@ -24,10 +28,33 @@ if __name__ == '__main__':
                         default=os.environ.get('GH_OUTPUT_DATA_DIR'),
                         help='Output data directory (default: '
                         '`GH_OUTPUT_DATA_DIR` environment variable).')
+    parser.add_argument('--max_workers', type=int, default=MAX_WORKERS,
+                        help='Number of flyer items to download concurrently '
+                        '(default: %s).' % MAX_WORKERS)
+    parser.add_argument('--no_cache', action='store_true',
+                        help='Ignore cached item responses.')
+    parser.add_argument('--storage', choices=('csv', 'parquet'),
+                        default='csv',
+                        help='Flyer storage format (default: csv).')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Re-check downloaded flyers and fetch only '
+                        'items that were added since.')
+    parser.add_argument('--images', action='store_true',
+                        help='Also download item images into '
+                        '<output_data_dir>/images.')
     args = parser.parse_args()
 
+    if args.postal_code is None:
+        args.postal_code = os.environ.get('GH_POSTAL_CODE', '').split()
+    if not args.postal_code:
+        parser.error('a postal code is required (--postal_code or '
+                     '`GH_POSTAL_CODE`)')
+
     if args.output_data_dir == None:
         args.output_data_dir = '.'
 
-    get_flyers(args.store, args.postal_code, args.output_data_dir)
+    get_flyers_many(itertools.product(args.store, args.postal_code),
+                    args.output_data_dir, max_workers=args.max_workers,
+                    cache=not args.no_cache, storage=args.storage,
+                    refresh=args.refresh, images=args.images)
     
\ No newline at end of file
@@ -0,0 +1,34 @@
+import argparse
+import datetime
+import logging
+import os
+
+from ..flyers import find_items
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('query', help='Words to look for in item names, '
+                        'brands and descriptions.')
+    parser.add_argument('--valid_on',
+                        default=datetime.date.today().isoformat(),
+                        help='Only show flyers valid on this date '
+                        '(YYYY-MM-DD, default: today).')
+    parser.add_argument('--merchant', default=None,
+                        help='Only show items from this merchant.')
+    parser.add_argument('--output_data_dir',
+                        default=os.environ.get('GH_OUTPUT_DATA_DIR'),
+                        help='Output data directory (default: '
+                        '`GH_OUTPUT_DATA_DIR` environment variable).')
+    args = parser.parse_args()
+
+    if args.output_data_dir == None:
+        args.output_data_dir = '.'
+
+    df = find_items(args.query, args.output_data_dir, valid_on=args.valid_on,
+                    merchant=args.merchant)
+    print(df[['merchant', 'name', 'price', 'post_price_text',
+              'valid_to']].to_string())
@@ -0,0 +1,39 @@
+import argparse
+import logging
+import time
+
+from ..flipp_stub import FlippStubServer
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--recordings', default=None,
+                        help='Directory of recorded responses (default: '
+                        'serve synthetic flyers).')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0,
+                        help='Seconds added to every response.')
+    parser.add_argument('--jitter', type=float, default=0,
+                        help='Random +/- seconds added to the latency.')
+    parser.add_argument('--error_rate', type=float, default=0,
+                        help='Fraction of requests answered with a 503.')
+    parser.add_argument('--flyers', type=int, default=2,
+                        help='Number of synthetic flyers.')
+    parser.add_argument('--items_per_flyer', type=int, default=300,
+                        help='Number of items per synthetic flyer.')
+    args = parser.parse_args()
+
+    with FlippStubServer(recordings=args.recordings, port=args.port,
+                         latency=args.latency, jitter=args.jitter,
+                         error_rate=args.error_rate, flyers=args.flyers,
+                         items_per_flyer=args.items_per_flyer) as server:
+        print('Serving a stand-in Flipp backend at %s (set '
+              'GH_FLIPP_BACKEND_URL to use it)' % server.url)
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,23 @@
+import argparse
+import logging
+import os
+
+from ..manifest import Manifest
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--output_data_dir',
+                        default=os.environ.get('GH_OUTPUT_DATA_DIR'),
+                        help='Output data directory (default: '
+                        '`GH_OUTPUT_DATA_DIR` environment variable).')
+    args = parser.parse_args()
+
+    if args.output_data_dir == None:
+        args.output_data_dir = '.'
+
+    count = Manifest(args.output_data_dir).rebuild()
+    print('Indexed %d artifacts in %s' % (count, args.output_data_dir))
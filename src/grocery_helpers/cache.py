@@ -0,0 +1,108 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+
+# Entries whose item has no usable `flyer_valid_to` are kept this long.
+DEFAULT_TTL = 7 * 24 * 60 * 60
+
+
+def _expiry(item, default_ttl=DEFAULT_TTL):
+    valid_to = item.get('item', {}).get('flyer_valid_to')
+    try:
+        return datetime.fromisoformat(valid_to.replace('Z', '+00:00')
+                                      ).timestamp()
+    except (AttributeError, TypeError, ValueError):
+        return time.time() + default_ttl
+
+
+def _cacheable(item):
+    return isinstance(item, dict) and 'item' in item
+
+
+class ItemCache:
+    # Two-level cache of Flipp item responses keyed by `flyer_item_id`: an
+    # in-process LRU in front of an SQLite database on disk. Entries expire
+    # when the flyer they belong to does.
+
+    def __init__(self, path, maxsize=4096, default_ttl=DEFAULT_TTL):
+        self._path = path
+        self._maxsize = maxsize
+        self._default_ttl = default_ttl
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS items ('
+                         'id TEXT PRIMARY KEY, '
+                         'expires REAL NOT NULL, '
+                         'data TEXT NOT NULL)')
+        self._db.commit()
+
+    def get(self, item_id):
+        key = str(item_id)
+        now = time.time()
+        with self._lock:
+            if key in self._lru:
+                expires, item = self._lru[key]
+                if expires > now:
+                    self._lru.move_to_end(key)
+                    return item
+                del self._lru[key]
+
+            row = self._db.execute('SELECT expires, data FROM items '
+                                   'WHERE id = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            expires, data = row
+            if expires <= now:
+                self._db.execute('DELETE FROM items WHERE id = ?', (key,))
+                self._db.commit()
+                return None
+            item = json.loads(data)
+            if not _cacheable(item):
+                # An error body cached by an older version.
+                self._db.execute('DELETE FROM items WHERE id = ?', (key,))
+                self._db.commit()
+                return None
+            self._remember(key, expires, item)
+            return item
+
+    def set(self, item_id, item):
+        # Responses without an item (e.g., error bodies) aren't cached.
+        if not _cacheable(item):
+            return
+        key = str(item_id)
+        expires = _expiry(item, self._default_ttl)
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO items (id, expires, data) '
+                             'VALUES (?, ?, ?)',
+                             (key, expires, json.dumps(item)))
+            self._db.commit()
+            self._remember(key, expires, item)
+
+    def purge(self):
+        # Drop every expired entry from disk.
+        with self._lock:
+            self._db.execute('DELETE FROM items WHERE expires <= ?',
+                             (time.time(),))
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._lru.clear()
+            self._db.close()
+
+    def _remember(self, key, expires, item):
+        self._lru[key] = (expires, item)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self._maxsize:
+            self._lru.popitem(last=False)
@@ -0,0 +1,133 @@
+import base64
+import json
+import re
+import weakref
+
+import pandas as pd
+from selenium.common.exceptions import WebDriverException
+
+
+# Kinds of request a page makes for its data.
+RESOURCE_TYPES = ('XHR', 'Fetch')
+
+_captures = weakref.WeakKeyDictionary()
+
+
+def enable(options):
+    # Have Chrome log DevTools network events, which `NetworkCapture` reads.
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    return options
+
+
+def start(driver):
+    # Start capturing the JSON a driver's pages fetch (the driver must have
+    # been started with `enable`d options).
+    capture = NetworkCapture(driver)
+    _captures[driver] = capture
+    return capture
+
+
+def get_capture(driver):
+    # The driver's `NetworkCapture`, or None if it isn't capturing.
+    return None if driver is None else _captures.get(driver)
+
+
+class NetworkCapture:
+    # JSON responses to the XHR/fetch requests a page makes, read from the
+    # driver's performance log. `clear` forgets what's been seen so far
+    # (e.g., before loading a new page).
+
+    def __init__(self, driver):
+        self._driver = weakref.proxy(driver)
+        self._pending = {}
+        self._finished = []
+        self._bodies = {}
+        driver.execute_cdp_cmd('Network.enable', {})
+
+    def _poll(self):
+        for entry in self._driver.get_log('performance'):
+            message = json.loads(entry['message'])['message']
+            params = message.get('params', {})
+            if message['method'] == 'Network.responseReceived':
+                response = params['response']
+                if (params.get('type') in RESOURCE_TYPES and
+                        'json' in response.get('mimeType', '')):
+                    self._pending[params['requestId']] = response['url']
+            elif message['method'] == 'Network.loadingFinished':
+                url = self._pending.pop(params['requestId'], None)
+                if url is not None:
+                    self._finished.append((params['requestId'], url))
+
+    def clear(self):
+        self._poll()
+        self._pending.clear()
+        self._finished = []
+        self._bodies.clear()
+
+    def _body(self, request_id):
+        if request_id not in self._bodies:
+            try:
+                body = self._driver.execute_cdp_cmd(
+                    'Network.getResponseBody', {'requestId': request_id})
+            except WebDriverException:
+                # Chrome has already let go of it.
+                return None
+            try:
+                text = body['body']
+                if body.get('base64Encoded'):
+                    text = base64.b64decode(text).decode('utf-8')
+                self._bodies[request_id] = json.loads(text)
+            except (KeyError, ValueError):
+                # Served as JSON but isn't (e.g., empty or truncated).
+                self._bodies[request_id] = None
+        return self._bodies[request_id]
+
+    def json(self, pattern):
+        # Bodies of the JSON responses whose URL matches the regex
+        # `pattern`, oldest first.
+        self._poll()
+        bodies = [self._body(request_id) for request_id, url in self._finished
+                  if re.search(pattern, url)]
+        return [body for body in bodies if body is not None]
+
+    def captured(self, pattern):
+        # A `waits.wait_for` condition: `json(pattern)`, once it has
+        # something.
+        return lambda driver: self.json(pattern) or False
+
+
+def _lookup(record, path):
+    # Follow a dotted `path` (e.g., 'total.value') into nested dicts.
+    value = record
+    for key in path.split('.'):
+        if not isinstance(value, dict) or key not in value:
+            raise KeyError(path)
+        value = value[key]
+    return value
+
+
+class Api:
+    # A JSON response a storefront page fetches: a regex `pattern` for its
+    # URL, the dotted path to its list of `records` (None if the payload is
+    # the list) and, for each column, the dotted path to read from each
+    # record. Missing fields raise KeyError, so callers can fall back to
+    # the DOM if the payload isn't shaped as expected.
+
+    def __init__(self, pattern, records=None, columns=None):
+        self.pattern = pattern
+        self.records = records
+        self.columns = columns or {}
+
+    def frame(self, payloads):
+        rows = []
+        for payload in payloads:
+            records = _lookup(payload, self.records) if self.records else payload
+            if isinstance(records, dict):
+                records = [records]
+            for record in records:
+                rows.append({column: _lookup(record, path)
+                             for column, path in self.columns.items()})
+        return pd.DataFrame(rows, columns=list(self.columns))
+
+    def __repr__(self):
+        return 'Api(%r)' % self.pattern
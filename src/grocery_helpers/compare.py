@@ -0,0 +1,93 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .api import (RealCanadianSuperstoreAPI, LowblawsAPI, ZehrsAPI,
+                  ValumartAPI, WalmartAPI, SEARCH_COLUMNS)
+
+
+STORE_APIS = [RealCanadianSuperstoreAPI, LowblawsAPI, ZehrsAPI, ValumartAPI,
+              WalmartAPI]
+
+COLUMNS = ['store', 'term'] + SEARCH_COLUMNS
+
+STATS_COLUMNS = ['store', 'terms', 'rows', 'no_results', 'errors', 'seconds',
+                 'mean_seconds', 'p50_seconds', 'p95_seconds', 'max_seconds',
+                 'error']
+
+
+def _search_store(store, terms, workers, timeout):
+    # Every term at one store, as (normalized frames by term, stats row).
+    frames = {}
+    timings = {}
+    errors = {}
+    error = None
+    start = time.perf_counter()
+    try:
+        # Terms that fail give an empty frame and land in `errors`.
+        for term, df in store.iter_search_many(terms, workers, timeout,
+                                               timings, errors):
+            if term not in errors:
+                frames[term] = store.normalize_search(df)
+    except Exception as e:
+        # One store failing (e.g., its browsers not starting) shouldn't sink
+        # the others.
+        error = repr(e)
+    seconds = time.perf_counter() - start
+    if error is None and errors:
+        error = '%s: %r' % next(iter(errors.items()))
+
+    latencies = np.array(list(timings.values()), dtype=float)
+    if not len(latencies):
+        latencies = np.array([np.nan])
+    stats = {'store': store.store_name,
+             'terms': len(frames) + len(errors),
+             'rows': sum(len(df) for df in frames.values()),
+             'no_results': sum(len(df) == 0 for df in frames.values()),
+             'errors': len(errors),
+             'seconds': seconds,
+             'mean_seconds': np.mean(latencies),
+             'p50_seconds': np.percentile(latencies, 50),
+             'p95_seconds': np.percentile(latencies, 95),
+             'max_seconds': np.max(latencies),
+             'error': error}
+    return frames, stats
+
+
+def compare_prices(terms, stores=None, workers=2, timeout=10):
+    # Search every store for every term (search terms or SKUs) at once: the
+    # stores run side by side, each across `workers` browsers (see
+    # `GroceryHelpersAPI.iter_search_many`), so a comparison takes about as
+    # long as the slowest store.
+    #
+    # `stores` is a list of store APIs (default: one of each in
+    # `STORE_APIS`). Returns two frames:
+    #
+    #   prices  one row per search result: store, term, sku, name, price,
+    #           unit_price and link, in the order of `stores` and `terms`
+    #   stats   one row per store: terms searched, rows found, terms
+    #           without results, terms whose search failed, wall time and
+    #           per-term search latency (mean/p50/p95/max seconds), and the
+    #           first error (the one that stopped it, or a failed term's)
+    terms = list(dict.fromkeys(terms))
+    if stores is None:
+        stores = [cls() for cls in STORE_APIS]
+
+    with ThreadPoolExecutor(max_workers=max(1, len(stores))) as executor:
+        results = list(executor.map(
+            lambda store: _search_store(store, terms, workers, timeout),
+            stores))
+
+    frames = []
+    for store, (store_frames, stats) in zip(stores, results):
+        for term in terms:
+            if term in store_frames:
+                frames.append(store_frames[term].assign(
+                    store=store.store_name, term=term))
+    prices = (pd.concat(frames, ignore_index=True)[COLUMNS] if frames
+              else pd.DataFrame(columns=COLUMNS))
+    stats = pd.DataFrame([stats for _, stats in results],
+                         columns=STATS_COLUMNS)
+    return prices, stats
@@ -0,0 +1,286 @@
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+from . import capture as network_capture
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+# Requests a lean browser never makes: fonts, media and third-party
+# analytics/ad scripts. Images are switched off with a Chrome pref instead.
+LEAN_BLOCKED_URLS = [
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.m3u8', '*.mp3',
+    '*doubleclick.net*', '*googlesyndication.com*', '*google-analytics.com*',
+    '*googletagmanager.com*', '*googleadservices.com*', '*facebook.net*',
+    '*hotjar.com*', '*newrelic.com*', '*nr-data.net*', '*criteo.com*',
+    '*adobedtm.com*', '*omtrdc.net*', '*demdex.net*', '*bing.com*',
+    '*tiktok.com*', '*pinterest.com*', '*quantserve.com*',
+]
+
+# Chrome content settings: 2 means "block".
+LEAN_PREFS = {
+    'profile.managed_default_content_settings.images': 2,
+    'profile.managed_default_content_settings.media_stream': 2,
+    'profile.managed_default_content_settings.notifications': 2,
+    'profile.managed_default_content_settings.geolocation': 2,
+}
+
+
+def chrome_options(headless=False, user_data_dir=None, lean=False,
+                   capture=False):
+    options = webdriver.ChromeOptions()
+    options.add_argument('window-size=1200x600')
+
+    if user_data_dir:
+        options.add_argument('user-data-dir=%s' % user_data_dir)
+
+    if headless:
+        options.add_argument('headless')
+
+    if lean:
+        # Skip images, and hand back pages once the DOM is parsed rather
+        # than after every subresource has loaded.
+        options.add_experimental_option('prefs', LEAN_PREFS)
+        options.add_argument('blink-settings=imagesEnabled=false')
+        options.add_argument('disable-extensions')
+        options.set_capability('pageLoadStrategy', 'eager')
+
+    if capture:
+        network_capture.enable(options)
+
+    return options
+
+
+def block_urls(driver, patterns=LEAN_BLOCKED_URLS):
+    # Have Chrome fail requests matching any of `patterns` (wildcards are
+    # allowed) before they go out.
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(patterns)})
+
+
+def new_driver(headless=None, user_data_dir=None, lean=False, capture=False):
+    # A lean browser is headless unless asked otherwise, blocks images,
+    # fonts, media and trackers, and doesn't wait for them to load. With
+    # `capture`, the JSON its pages fetch is recorded (see
+    # `capture.get_capture`).
+    if headless is None:
+        headless = lean
+    driver = webdriver.Chrome(options=chrome_options(headless, user_data_dir,
+                                                     lean, capture))
+    if lean:
+        block_urls(driver)
+    if capture:
+        network_capture.start(driver)
+    driver.maximize_window()
+    return driver
+
+
+def is_alive(driver):
+    # One cheap round trip; fails if Chrome or chromedriver has gone away.
+    try:
+        driver.current_url
+        return True
+    except WebDriverException:
+        return False
+
+
+def browser_processes(driver):
+    # chromedriver and every Chrome process under it (needs psutil).
+    if psutil is None:
+        return []
+    try:
+        process = psutil.Process(driver.service.process.pid)
+        return [process] + process.children(recursive=True)
+    except (AttributeError, psutil.Error):
+        return []
+
+
+def rss_mb(driver):
+    total = 0
+    for process in browser_processes(driver):
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            pass
+    return total / 2 ** 20
+
+
+def quit_driver(driver, timeout=5):
+    # Quit, then kill any chromedriver or Chrome process that outlives it.
+    processes = browser_processes(driver)
+    try:
+        driver.quit()
+    except WebDriverException:
+        pass
+    if processes:
+        gone, alive = psutil.wait_procs(processes, timeout=timeout)
+        for process in alive:
+            try:
+                process.kill()
+            except psutil.Error:
+                pass
+
+
+class RecyclePolicy:
+    # When to swap a browser for a fresh one: after `max_page_loads` page
+    # loads, or once chromedriver and its Chrome processes use more than
+    # `max_rss_mb` MB (needs psutil). Either limit may be None.
+
+    def __init__(self, max_page_loads=500, max_rss_mb=None):
+        self.max_page_loads = max_page_loads
+        self.max_rss_mb = max_rss_mb
+        self._page_loads = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def page_loaded(self, driver):
+        with self._lock:
+            self._page_loads[driver] = self._page_loads.get(driver, 0) + 1
+
+    def page_loads(self, driver):
+        with self._lock:
+            return self._page_loads.get(driver, 0)
+
+    def expired(self, driver):
+        if (self.max_page_loads is not None and
+                self.page_loads(driver) >= self.max_page_loads):
+            return True
+        return self.max_rss_mb is not None and rss_mb(driver) > self.max_rss_mb
+
+
+class DriverPool:
+    # Warm Chrome instances that store APIs check out for a call and hand
+    # back afterwards, instead of launching a browser per call:
+    #
+    #     pool = DriverPool(size=4, headless=True)
+    #     zehrs = ZehrsAPI(driver_pool=pool)
+    #     loblaws = LowblawsAPI(driver_pool=pool)
+    #
+    # `lean=True` and `capture=True` start lean or capturing browsers (see
+    # `new_driver`).
+    #
+    # Browsers are started on demand up to `size` and checked for health
+    # when they are checked out, and replaced once `recycle` (a
+    # `RecyclePolicy`) says so. Chrome locks its profile, so only use a
+    # `user_data_dir` with a pool of size 1.
+
+    def __init__(self, size=2, headless=None, user_data_dir=None,
+                 factory=None, recycle=None, lean=False, capture=False):
+        self.size = size
+        self.recycle = recycle
+        self._factory = factory or (lambda: new_driver(headless,
+                                                       user_data_dir, lean,
+                                                       capture))
+        # LIFO, so the most recently used (warmest) browser goes out first.
+        self._idle = []
+        self._created = 0
+        self._closed = False
+        # Notified whenever a driver is checked in or a place frees up.
+        self._available = threading.Condition()
+
+    def _reserve(self):
+        # Take a place for a new driver (with `_available` held); False if
+        # the pool is full.
+        if self._closed:
+            raise RuntimeError('Driver pool is closed')
+        if self._created >= self.size:
+            return False
+        self._created += 1
+        return True
+
+    def _release(self):
+        with self._available:
+            self._created -= 1
+            self._available.notify()
+
+    def _start(self):
+        # Start a driver in a place already reserved.
+        try:
+            return self._factory()
+        except Exception:
+            self._release()
+            raise
+
+    def _create(self):
+        with self._available:
+            if not self._reserve():
+                return None
+        return self._start()
+
+    def discard(self, driver):
+        # Quit a driver and free its place in the pool, so a waiting
+        # `checkout` can start another.
+        self._release()
+        quit_driver(driver)
+
+    def checkout(self, timeout=None):
+        # Wait up to `timeout` seconds (forever if None) for a driver.
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._available:
+                while not self._idle and not self._reserve():
+                    remaining = (None if deadline is None
+                                 else deadline - time.monotonic())
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError('No driver available after %s s' %
+                                           timeout)
+                    self._available.wait(remaining)
+                driver = self._idle.pop() if self._idle else None
+            if driver is None:
+                return self._start()
+            if is_alive(driver):
+                return driver
+            self.discard(driver)
+
+    def checkin(self, driver):
+        if self._closed or (self.recycle and self.recycle.expired(driver)):
+            self.discard(driver)
+            return
+        with self._available:
+            self._idle.append(driver)
+            self._available.notify()
+
+    @contextmanager
+    def driver(self, timeout=None):
+        driver = self.checkout(timeout)
+        try:
+            yield driver
+        finally:
+            self.checkin(driver)
+
+    def warm(self, n=None):
+        # Start up to `n` (default `size`) browsers ahead of time.
+        drivers = []
+        for i in range(self.size if n is None else n):
+            driver = self._create()
+            if driver is None:
+                break
+            drivers.append(driver)
+        for driver in drivers:
+            self.checkin(driver)
+        return len(drivers)
+
+    def close(self):
+        # Quit every idle driver; drivers still checked out are quit when
+        # they come back.
+        with self._available:
+            self._closed = True
+            drivers, self._idle = self._idle, []
+            # Waiters find the pool closed.
+            self._available.notify_all()
+        for driver in drivers:
+            self.discard(driver)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,111 @@
+# Walks a page spec (see `Field`) in the browser and returns what it finds
+# as plain JSON, so a whole page costs one WebDriver round trip.
+EXTRACT_JS = '''
+function get(root, spec) {
+    var elements;
+    if (spec.selector === null) {
+        elements = [root];
+    } else if (spec.many) {
+        elements = Array.prototype.slice.call(
+            root.querySelectorAll(spec.selector));
+    } else {
+        var element = root.querySelector(spec.selector);
+        elements = element ? [element] : [];
+    }
+    var values = elements.map(function (element) {
+        return value(element, spec);
+    });
+    if (spec.many) {
+        return values;
+    }
+    return values.length ? values[0] : null;
+}
+
+function value(element, spec) {
+    if (spec.fields) {
+        var record = {};
+        for (var name in spec.fields) {
+            record[name] = get(element, spec.fields[name]);
+        }
+        return record;
+    }
+    var result;
+    if (spec.attr === null) {
+        result = element.innerText;
+    } else if (spec.attr in element) {
+        // Properties first, like WebElement.get_attribute (so e.g. `href`
+        // is absolute).
+        result = element[spec.attr];
+    } else {
+        result = element.getAttribute(spec.attr);
+    }
+    if (spec.json && result !== null) {
+        result = JSON.parse(result);
+    }
+    return result;
+}
+
+var fields = arguments[0];
+var page = {};
+for (var name in fields) {
+    page[name] = get(document, fields[name]);
+}
+return page;
+'''
+
+
+class Field:
+    # Something to read off a page: the text of the first element matching
+    # the CSS `selector` (the parent element itself if None), or its
+    # attribute/property `attr`. Missing elements give None.
+    #
+    # `many=True` reads every match into a list, `json=True` parses the
+    # value as JSON and `fields` (a dict of name -> `Field`, looked up
+    # within each match) turns a match into a dict:
+    #
+    #     SEARCH_PAGE = {
+    #         'items': Field('.tile', many=True, fields={
+    #             'name': Field('.name'),
+    #             'link': Field('a', attr='href'),
+    #         }),
+    #     }
+
+    def __init__(self, selector=None, attr=None, many=False, json=False,
+                 fields=None):
+        self.selector = selector
+        self.attr = attr
+        self.many = many
+        self.json = json
+        self.fields = fields
+
+    def spec(self):
+        return {'selector': self.selector,
+                'attr': self.attr,
+                'many': self.many,
+                'json': self.json,
+                'fields': compile_fields(self.fields) if self.fields else None}
+
+    def __repr__(self):
+        return 'Field(%r)' % self.selector
+
+
+def compile_fields(fields):
+    # A dict of name -> `Field` as the JSON spec `EXTRACT_JS` takes.
+    return {name: field.spec() for name, field in fields.items()}
+
+
+def extract(driver, fields):
+    # Read every field in `fields` off the current page in one round trip.
+    return driver.execute_script(EXTRACT_JS, compile_fields(fields))
+
+
+def extracted(fields, ready):
+    # A `waits.wait_for` condition: the extracted page, once `ready(page)`
+    # is true.
+    spec = compile_fields(fields)
+
+    def condition(driver):
+        page = driver.execute_script(EXTRACT_JS, spec)
+        return page if ready(page) else False
+    return condition
+
@@ -0,0 +1,162 @@
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FlippStubServer:
+    # Local stand-in for the Flipp backend, serving `/items/search` and
+    # `/items/<id>` either from recorded JSON (see `record`) or from a
+    # synthetic set of flyers, with configurable latency and error rate:
+    #
+    #     with FlippStubServer(latency=0.05, error_rate=0.01) as server:
+    #         flyers.set_backend_url(server.url)
+    #         flyers.get_flyers('Zehrs', 'N2H5M5', data_directory)
+    #
+    # Recordings live in a directory holding 'search/<query>.json' and
+    # 'items/<flyer item id>.json'.
+
+    def __init__(self, recordings=None, latency=0, jitter=0, error_rate=0,
+                 flyers=2, items_per_flyer=300, host='127.0.0.1', port=0,
+                 seed=None):
+        self.recordings = recordings
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.flyers = flyers
+        self.items_per_flyer = items_per_flyer
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return 'http://%s:%d' % (host, port)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def search(self, query):
+        if self.recordings:
+            return self._load('search', query)
+        flyer_ids = [1000 + i for i in range(self.flyers)]
+        return {
+            'merchants': [{'name': query}],
+            'flyers': [{'id': flyer_id} for flyer_id in flyer_ids],
+            'items': [{'flyer_id': flyer_id,
+                       'flyer_item_id': flyer_id * 100000 + i,
+                       'name': 'Item %d' % i}
+                      for flyer_id in flyer_ids
+                      for i in range(self.items_per_flyer)],
+        }
+
+    def item(self, item_id):
+        if self.recordings:
+            return self._load('items', item_id)
+        item_id = int(item_id)
+        i = item_id % 100000
+        return {'item': {
+            'id': item_id,
+            'flyer_id': item_id // 100000,
+            'name': 'Item %d' % i,
+            'brand': 'Brand %d' % (i % 17),
+            'description': 'Stand-in item %d' % i,
+            'merchant': 'Stand-in Grocer',
+            'price': '%.2f' % (1 + i % 20 * 0.5),
+            'pre_price_text': '2/' if i % 5 == 0 else '',
+            'post_price_text': '/lb' if i % 3 == 0 else '',
+            'sale_story': 'SAVE $%d' % (i % 4) if i % 4 else '',
+            'valid_from': '2020-05-14T00:00:00-04:00',
+            'valid_to': '2020-05-20T23:59:59-04:00',
+            'flyer_valid_from': '2020-05-14T00:00:00-04:00',
+            'flyer_valid_to': '2020-05-20T23:59:59-04:00',
+            'cutout_image_url': None,
+        }}
+
+    def _load(self, kind, key):
+        path = os.path.join(self.recordings, kind, '%s.json' % key)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                parts = [x for x in url.path.split('/') if x]
+                if server.latency or server.jitter:
+                    time.sleep(max(0, server.latency + server.jitter *
+                                   server._random.uniform(-1, 1)))
+                with server._lock:
+                    server.requests += 1
+                    fail = server._random.random() < server.error_rate
+                    server.errors += fail
+                if fail:
+                    return self._send(503, {'error': 'stand-in failure'})
+
+                data = None
+                if parts[-2:] == ['items', 'search']:
+                    query = parse_qs(url.query).get('q', [''])[0]
+                    data = server.search(query)
+                elif len(parts) >= 2 and parts[-2] == 'items':
+                    data = server.item(parts[-1])
+                if data is None:
+                    return self._send(404, {'error': 'not found'})
+                self._send(200, data)
+
+            def _send(self, status, data):
+                body = json.dumps(data).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def record(merchant, postal_code, directory):
+    # Save the real backend's responses for one search (and all its items)
+    # so they can be served back by `FlippStubServer(recordings=...)`.
+    from . import flyers
+
+    data = flyers.search(merchant, postal_code)
+    os.makedirs(os.path.join(directory, 'search'), exist_ok=True)
+    os.makedirs(os.path.join(directory, 'items'), exist_ok=True)
+    with open(os.path.join(directory, 'search', '%s.json' % merchant),
+              'w') as f:
+        json.dump(data, f)
+    for item in data['items']:
+        item_id = item['flyer_item_id']
+        with open(os.path.join(directory, 'items', '%s.json' % item_id),
+                  'w') as f:
+            json.dump(flyers.scrape_item(item_id), f)
+    return len(data['items'])
@@ -1,78 +1,668 @@
-import requests
+import asyncio
 import os
-import glob
+import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import pandas as pd
-import arrow
+
+from .cache import ItemCache
+from .images import ImageStore
+from .index import FlyerIndex
+from .governor import get_governor, new_session
+from .manifest import Manifest
+from .storage import get_storage, parse_datetimes, read_flyer
 
 
 BASE_URL = 'https://flipp.com'
-BACKEND_URL = 'https://backflipp.wishabi.com/flipp'
+BACKEND_URL = os.environ.get('GH_FLIPP_BACKEND_URL',
+                             'https://backflipp.wishabi.com/flipp')
 SEARCH_URL = '%s/items/search' % BACKEND_URL
 ITEM_URL = '%s/items/' % BACKEND_URL
 
+# Number of items fetched concurrently per flyer.
+MAX_WORKERS = 16
+
+# Column holding each item's `flyer_item_id` in a scraped flyer.
+ITEM_ID_FIELD = 'id'
+
+_session = None
+_async_clients = {}
+
+
+def set_backend_url(url):
+    # Point the module at another backend (e.g., a `FlippStubServer`).
+    global BACKEND_URL, SEARCH_URL, ITEM_URL
+    BACKEND_URL = url.rstrip('/')
+    SEARCH_URL = '%s/items/search' % BACKEND_URL
+    ITEM_URL = '%s/items/' % BACKEND_URL
+
+
+def get_session():
+    # Share one keep-alive session (and its connection pool) between calls
+    # and worker threads.
+    global _session
+    if _session is None:
+        _session = new_session(pool_maxsize=4 * MAX_WORKERS)
+    return _session
+
+
+def _get(url, session=None, params=None):
+    # Every request to the backend goes through the shared rate governor.
+    session = session or get_session()
+    return get_governor().get(session, url, params=params).json()
+
+
+class BadItemResponse(ValueError):
+    pass
+
+
+def _is_item(item):
+    return isinstance(item, dict) and 'item' in item
+
+
+def _check_item(item_id, item):
+    # Only real item payloads get cached or checkpointed.
+    if not _is_item(item):
+        raise BadItemResponse('No item in the response for %s: %r' %
+                              (item_id, item))
+    return item
+
 
-def scrape_item(item_id):
-    return requests.get(
-        "%s/%s" % (ITEM_URL, item_id,)
-    ).json()
+def get_item_cache(data_directory):
+    return ItemCache(os.path.join(data_directory, '.cache', 'items.sqlite'))
 
 
-def search(query, postal_code):
-    return requests.get(
+def scrape_item(item_id, session=None, cache=None):
+    if cache is not None:
+        item = cache.get(item_id)
+        if item is not None:
+            return item
+
+    item = _get("%s/%s" % (ITEM_URL, item_id,), session)
+    _check_item(item_id, item)
+
+    if cache is not None:
+        cache.set(item_id, item)
+    return item
+
+
+def search(query, postal_code, session=None):
+    return _get(
         SEARCH_URL,
+        session,
         params = {
             'q': query,
             'postal_code': postal_code,
         }
-    ).json()
+    )
 
 
-def scrape_details(data, flyer_id=None):
-    items = [
-            scrape_item(x.get('flyer_item_id'))
-            for x in data.get('items')
-            if flyer_id is None or x.get('flyer_id') == flyer_id
-    ]
-    
+def group_items_by_flyer(data):
+    # Map each flyer id in a search result to its item ids (in search
+    # order) in a single pass over the items.
+    items_by_flyer = {}
+    for item in data.get('items'):
+        item_ids = items_by_flyer.setdefault(item.get('flyer_id'), {})
+        item_ids.setdefault(item.get('flyer_item_id'), None)
+    return {flyer_id: list(item_ids)
+            for flyer_id, item_ids in items_by_flyer.items()}
+
+
+def _to_frame(items):
     data = {}
     if len(items):
         # convert to pandas DataFrame
         for k in items[0]['item'].keys():
             data[k] = [item['item'][k] for item in items]
-    return pd.DataFrame(data)
+    return parse_datetimes(pd.DataFrame(data))
+
+
+LB_PER_KG = 2.20462
+
+# Multiplier from a price per basis to a price per kg.
+PRICE_BASIS_PER_KG = {
+    'kg': 1,
+    'lb': LB_PER_KG,
+    '100g': 10,
+    'each': float('nan'),
+}
+
+
+def parse_prices(df):
+    # Parse the free-form price fields of a flyer into typed columns, a
+    # whole column at a time:
+    #
+    #   price_value         advertised price (e.g., 5.00 for '2/$5')
+    #   multi_buy_quantity  number of units the price buys (2 for '2/$5')
+    #   unit_price          price for one unit (2.50 for '2/$5')
+    #   price_basis         what a unit is: 'each', 'kg', 'lb' or '100g'
+    #   price_per_kg        normalized $/kg (NaN for per-each prices)
+    #   savings             advertised savings (e.g., 'SAVE $1.50')
+    def text(field):
+        if field in df:
+            return df[field].fillna('').astype(str)
+        return pd.Series('', index=df.index, dtype=object)
+
+    price = text('price')
+    pre_price = text('pre_price_text')
+    post_price = text('post_price_text')
+    sale_story = text('sale_story')
+
+    cents = price.str.contains('¢') | post_price.str.contains(r'^\s*¢')
+    price_value = pd.to_numeric(price.str.replace(r'[^\d.]', '', regex=True),
+                                errors='coerce')
+    price_value = price_value.where(~cents, price_value / 100)
+
+    # '2/', '2 for', '3 FOR'
+    quantity = pd.to_numeric(pre_price.str.extract(
+        r'^\s*(\d+)\s*(?:/|for\b)', flags=re.IGNORECASE)[0], errors='coerce')
+
+    # Multi-buy deals are sometimes only spelled out in the sale story.
+    deal = sale_story.str.extract(r'(\d+)\s*(?:/|for)\s*\$(\d+(?:\.\d+)?)',
+                                  flags=re.IGNORECASE)
+    no_price = price_value.isna()
+    price_value = price_value.fillna(pd.to_numeric(deal[1], errors='coerce'))
+    quantity = quantity.fillna(pd.to_numeric(deal[0], errors='coerce'
+                                             ).where(no_price))
+    quantity = quantity.fillna(1)
+
+    basis = post_price.str.extract(r'(kg|lb|100\s*g)\b', flags=re.IGNORECASE
+                                   )[0].str.lower().str.replace(' ', '')
+    basis = basis.fillna('each')
+
+    unit_price = price_value / quantity
+    price_per_kg = unit_price * basis.map(PRICE_BASIS_PER_KG)
+    # Prefer an explicit $/kg (e.g. '/lb 8.80/kg') to a converted one.
+    price_per_kg = pd.to_numeric(post_price.str.extract(
+        r'(\d+(?:\.\d+)?)\s*/\s*kg', flags=re.IGNORECASE)[0],
+        errors='coerce').fillna(price_per_kg)
+
+    savings = sale_story.str.extract(
+        r'save\s*(?:up\s*to\s*)?\$?(\d+(?:\.\d+)?)\s*(¢)?',
+        flags=re.IGNORECASE)
+    savings_value = pd.to_numeric(savings[0], errors='coerce')
+    savings_value = savings_value.where(savings[1].isna(), savings_value / 100)
+
+    return df.assign(price_value=price_value,
+                     multi_buy_quantity=quantity.astype(int),
+                     unit_price=unit_price,
+                     price_basis=basis.astype('category'),
+                     price_per_kg=price_per_kg,
+                     savings=savings_value)
+
+
+def _checkpoint_path(checkpoint_directory, flyer_id):
+    return os.path.join(checkpoint_directory, 'flyer %s.ndjson' % flyer_id)
+
+
+def _read_checkpoint(path):
+    items = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Partial line from an interrupted write.
+                    continue
+                # Skip error bodies written by older versions.
+                if _is_item(record.get('item')):
+                    items[record['flyer_item_id']] = record['item']
+    return items
+
+
+def _append_checkpoint(checkpoint_directory, flyer_id, item_id, item):
+    if checkpoint_directory:
+        with open(_checkpoint_path(checkpoint_directory, flyer_id), 'a') as f:
+            f.write(json.dumps({'flyer_item_id': item_id, 'item': item}) + '\n')
+
+
+def _remove_checkpoint(checkpoint_directory, flyer_id):
+    if checkpoint_directory:
+        path = _checkpoint_path(checkpoint_directory, flyer_id)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def iter_scrape_items(items_by_flyer, max_workers=MAX_WORKERS, session=None,
+                      cache=None, checkpoint_directory=None):
+    # Stream (flyer_id, position, item) for every item of several flyers as
+    # it arrives, fetching through one shared pool of workers.
+    #
+    # With a `checkpoint_directory`, each item is also appended to an NDJSON
+    # checkpoint per flyer, and items already in a checkpoint are replayed
+    # from it instead of being fetched again.
+    #
+    # Items are checkpointed by the workers as soon as they arrive. If one
+    # fails, the rest are still fetched (and checkpointed) and the first
+    # error is raised once they're in.
+    session = session or get_session()
+    if checkpoint_directory:
+        os.makedirs(checkpoint_directory, exist_ok=True)
+    checkpoint_lock = threading.Lock()
+
+    def fetch(flyer_id, item_id):
+        item = scrape_item(item_id, session, cache)
+        with checkpoint_lock:
+            _append_checkpoint(checkpoint_directory, flyer_id, item_id, item)
+        return item
+
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        futures = {}
+        for flyer_id, item_ids in items_by_flyer.items():
+            done = {}
+            if checkpoint_directory:
+                done = _read_checkpoint(_checkpoint_path(checkpoint_directory,
+                                                         flyer_id))
+            for i, item_id in enumerate(item_ids):
+                if item_id in done:
+                    yield flyer_id, i, done[item_id]
+                else:
+                    future = executor.submit(fetch, flyer_id, item_id)
+                    futures[future] = (flyer_id, i, item_id)
+
+        error = None
+        for future in as_completed(futures):
+            flyer_id, i, item_id = futures.pop(future)
+            try:
+                item = future.result()
+            except Exception as e:
+                error = error or e
+                continue
+            yield flyer_id, i, item
+        if error is not None:
+            raise error
+    finally:
+        # Don't start fetching anything else if the caller stopped early.
+        executor.shutdown(cancel_futures=True)
+
+
+def scrape_flyers(items_by_flyer, max_workers=MAX_WORKERS, session=None,
+                  cache=None, checkpoint_directory=None):
+    # Scrape several flyers through one shared pool of workers, yielding
+    # (flyer_id, DataFrame) as soon as each flyer's last item arrives.
+    # Items within a flyer keep the order they were given in.
+    #
+    # A flyer's checkpoint is removed once the caller has handled the
+    # finished flyer (i.e. when it asks for the next one), so an
+    # interrupted run resumes where it left off.
+    results = {}
+    remaining = {}
+    for flyer_id, item_ids in items_by_flyer.items():
+        results[flyer_id] = [None] * len(item_ids)
+        remaining[flyer_id] = len(item_ids)
+
+    def finish(flyer_id):
+        yield flyer_id, _to_frame(results.pop(flyer_id))
+        _remove_checkpoint(checkpoint_directory, flyer_id)
+
+    for flyer_id in [flyer_id for flyer_id, count in remaining.items()
+                     if count == 0]:
+        yield from finish(flyer_id)
+
+    for flyer_id, i, item in iter_scrape_items(
+            items_by_flyer, max_workers=max_workers, session=session,
+            cache=cache, checkpoint_directory=checkpoint_directory):
+        results[flyer_id][i] = item
+        remaining[flyer_id] -= 1
+        if remaining[flyer_id] == 0:
+            yield from finish(flyer_id)
+
+
+def scrape_details(data, flyer_id=None, max_workers=MAX_WORKERS,
+                   session=None, cache=None):
+    item_ids = [
+            x.get('flyer_item_id')
+            for x in data.get('items')
+            if flyer_id is None or x.get('flyer_id') == flyer_id
+    ]
+    return dict(scrape_flyers({flyer_id: item_ids}, max_workers=max_workers,
+                              session=session, cache=cache))[flyer_id]
+
 
+def _merge_refreshed(df, df_added, item_ids):
+    # Combine the items kept from a stored flyer with newly scraped ones, in
+    # the order of the latest search.
+    order = {item_id: i for i, item_id in enumerate(item_ids)}
+    df = pd.concat([df, df_added], ignore_index=True)
+    return df.iloc[df[ITEM_ID_FIELD].map(order).argsort(kind='stable')
+                   ].reset_index(drop=True)
 
-def get_flyers(merchant, postal_code, data_directory):
-    data = search(merchant, postal_code)
-    assert(merchant == data['merchants'][0]['name'])
 
-    flyer_ids = [flyer['id'] for flyer in data['flyers']]
+def _setup(data_directory, cache, manifest, storage, index, images):
+    # `cache` may be an `ItemCache`, True to use the one in `data_directory`,
+    # or False to always go to the network. `images` likewise takes an
+    # `ImageStore`, True or False.
+    if cache is True:
+        cache = get_item_cache(data_directory)
+    elif cache is False:
+        cache = None
+    if images is True:
+        images = ImageStore(data_directory)
+    return cache, _FlyerWriter(manifest or Manifest(data_directory),
+                               get_storage(storage, data_directory),
+                               index or FlyerIndex(data_directory),
+                               images or None)
 
-    flyers = []
-    for flyer_id in flyer_ids:
-        flyer_path = glob.glob(os.path.join(data_directory,
-                                            merchant,
-                                            'flyers',
-                                            '*%s.csv' % flyer_id))
-        if flyer_path:
-            print('Already downloaded flyer %s for %s' % (flyer_id, merchant))
-            flyers.append(pd.read_csv(flyer_path[0], index_col=0))
+
+class _FlyerWriter:
+    # Everything that happens when a flyer is saved: optionally fetching
+    # its images, writing it to storage, and recording it in the manifest
+    # and the item index.
+
+    def __init__(self, manifest, storage, index, images=None):
+        self.manifest = manifest
+        self.storage = storage
+        self.index = index
+        self.images = images
+
+    def save(self, df, flyer_id, overwrite=False):
+        if self.images is not None:
+            df = self.images.download(df, session=get_session())
+
+        dates = [df[field].iloc[0].date().isoformat()
+                 for field in ('flyer_valid_from', 'flyer_valid_to')]
+        merchant = df.iloc[0]['merchant']
+        filepath = self.storage.flyer_path(merchant, flyer_id, dates[1])
+
+        previous_path = self.manifest.path('flyer', flyer_id)
+        if overwrite or not os.path.exists(filepath):
+            self.storage.write(df, filepath)
+        if overwrite and previous_path and previous_path != filepath:
+            os.remove(previous_path)
+        self.manifest.add('flyer', flyer_id, filepath, store=merchant,
+                          valid_from=dates[0], valid_to=dates[1],
+                          rows=len(df))
+        self.index.add_flyer(df, flyer_id)
+        return df
+
+
+def get_flyers(merchant, postal_code, data_directory, max_workers=MAX_WORKERS,
+               cache=True, manifest=None, storage='csv', refresh=False,
+               index=None, images=False):
+    return get_flyers_many([(merchant, postal_code)], data_directory,
+                           max_workers=max_workers, cache=cache,
+                           manifest=manifest, storage=storage, refresh=refresh,
+                           index=index, images=images)[(merchant, postal_code)]
+
+
+def get_flyers_many(pairs, data_directory, max_workers=MAX_WORKERS,
+                    cache=True, manifest=None, storage='csv', refresh=False,
+                    index=None, images=False):
+    # Get the flyers for many (merchant, postal code) pairs at once.
+    # Neighbouring postal codes mostly share flyers, so each unique flyer is
+    # only scraped once and then handed back to every pair that has it.
+    #
+    # With `refresh`, flyers that were already downloaded are diffed against
+    # the latest search by `flyer_item_id`: only added items are scraped and
+    # removed ones are dropped before the flyer is rewritten.
+    #
+    # With `images`, each flyer's item images are downloaded into the
+    # content-addressed image store and referenced from '<field>_path'
+    # columns.
+    #
+    # Returns a dictionary mapping each pair to its list of flyers.
+    cache, writer = _setup(data_directory, cache, manifest, storage, index,
+                           images)
+    pairs = list(dict.fromkeys(pairs))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(len(pairs),
+                                                   max_workers))) as executor:
+        results = list(executor.map(lambda pair: search(*pair), pairs))
+
+    plan = _plan_flyers(pairs, results, writer.manifest, refresh)
+
+    # Every missing flyer's items go through one shared queue, and each
+    # flyer is written out as soon as it's complete. Items are checkpointed
+    # as they arrive, so an interrupted run picks up where it stopped.
+    for flyer_id, df in scrape_flyers(
+            plan.to_scrape, max_workers=max_workers, cache=cache,
+            checkpoint_directory=_checkpoint_directory(data_directory)):
+        _store_flyer(plan, flyer_id, df, writer)
+
+    return plan.results()
+
+
+def _checkpoint_directory(data_directory):
+    return os.path.join(data_directory, '.checkpoints')
+
+
+class _FlyerPlan:
+    # What `get_flyers_many` (and its async counterpart) has to do for a
+    # batch of search results.
+
+    def __init__(self, pairs):
+        self.pairs = pairs
+        self.flyer_ids = {}
+        self.items = {}
+        self.flyers = {}
+        self.to_scrape = {}
+        self.refreshed = {}
+
+    def results(self):
+        return {pair: [self.flyers[flyer_id]
+                       for flyer_id in self.flyer_ids[pair]]
+                for pair in self.pairs}
+
+
+def _plan_flyers(pairs, results, manifest, refresh):
+    plan = _FlyerPlan(pairs)
+    merchants = {}
+    for (merchant, postal_code), data in zip(pairs, results):
+        assert(merchant == data['merchants'][0]['name'])
+        plan.flyer_ids[(merchant, postal_code)] = [flyer['id'] for flyer in
+                                                   data['flyers']]
+        items_by_flyer = group_items_by_flyer(data)
+        for flyer_id in plan.flyer_ids[(merchant, postal_code)]:
+            merchants.setdefault(flyer_id, merchant)
+            # Merge each flyer's items from every search it turned up in.
+            item_ids = plan.items.setdefault(flyer_id, {})
+            for item_id in items_by_flyer.get(flyer_id, []):
+                item_ids.setdefault(item_id, None)
+
+    for flyer_id, merchant in merchants.items():
+        item_ids = list(plan.items[flyer_id])
+        flyer_path = manifest.path('flyer', flyer_id)
+        if not flyer_path:
+            print('Scrape flyer %s for %s' % (flyer_id, merchant))
+            plan.to_scrape[flyer_id] = item_ids
             continue
 
-        print('Scrape flyer %s for %s' % (flyer_id, merchant))
-        df = scrape_details(data, flyer_id)
-        flyers.append(df)
-        
-        if len(df):
-            dates = [arrow.get(date).date().isoformat() for date in
-                     df.iloc[0][['flyer_valid_from', 'flyer_valid_to']].values.tolist()]
-            merchant = df.iloc[0]['merchant']
-            filepath = os.path.join(data_directory, merchant, 'flyers',
-                                    '%s - %s flyer %s.csv' % (dates[1], merchant, flyer_id))
-
-            if not os.path.exists(filepath):
-                merchant_directory = os.path.join(data_directory, merchant, 'flyers')
-                os.makedirs(merchant_directory, exist_ok=True)
-                df.to_csv(filepath)
-    return flyers
\ No newline at end of file
+        df = read_flyer(flyer_path)
+        if refresh and len(df) and ITEM_ID_FIELD in df:
+            stored_ids = set(df[ITEM_ID_FIELD])
+            added = [item_id for item_id in item_ids
+                     if item_id not in stored_ids]
+            keep = df[ITEM_ID_FIELD].isin(item_ids)
+            if added or not keep.all():
+                print('Refresh flyer %s for %s (%d added, %d removed)' %
+                      (flyer_id, merchant, len(added), (~keep).sum()))
+                plan.refreshed[flyer_id] = df[keep]
+                plan.to_scrape[flyer_id] = added
+                continue
+
+        print('Already downloaded flyer %s for %s' % (flyer_id, merchant))
+        plan.flyers[flyer_id] = df
+    return plan
+
+
+def _store_flyer(plan, flyer_id, df, writer):
+    overwrite = flyer_id in plan.refreshed
+    if overwrite:
+        df = _merge_refreshed(plan.refreshed.pop(flyer_id), df,
+                              list(plan.items[flyer_id]))
+    if len(df):
+        df = writer.save(df, flyer_id, overwrite)
+    plan.flyers[flyer_id] = df
+
+
+def find_items(query, data_directory='.', valid_on=None, merchant=None,
+               limit=None, index=None):
+    # Search the items of every stored flyer, e.g.
+    #
+    #     find_items('chicken thighs', data_directory, valid_on=date.today())
+    index = index or FlyerIndex(data_directory)
+    # Pick up any flyers written before the index existed.
+    index.update()
+    return index.find(query, valid_on=valid_on, merchant=merchant,
+                      limit=limit)
+
+
+# Asyncio counterparts of the functions above, built on an HTTP/2 client
+# (httpx, installed with the 'async' extra) so that many requests share a
+# few multiplexed connections on one event loop.
+
+def get_async_client():
+    # One client per event loop, since a client can't outlive its loop.
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        for other_loop in [x for x in _async_clients if x.is_closed()]:
+            del _async_clients[other_loop]
+        client = httpx.AsyncClient(
+            http2=True, timeout=30,
+            limits=httpx.Limits(max_connections=MAX_WORKERS))
+        _async_clients[loop] = client
+    return client
+
+
+async def _async_get(url, client=None, params=None):
+    client = client or get_async_client()
+    response = await get_governor().get_async(client, url, params=params)
+    return response.json()
+
+
+async def _run_in_executor(func, *args):
+    # Run blocking (disk) work off the event loop.
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+async def async_scrape_item(item_id, client=None, cache=None):
+    if cache is not None:
+        item = await _run_in_executor(cache.get, item_id)
+        if item is not None:
+            return item
+
+    item = await _async_get("%s/%s" % (ITEM_URL, item_id,), client)
+    _check_item(item_id, item)
+
+    if cache is not None:
+        await _run_in_executor(cache.set, item_id, item)
+    return item
+
+
+async def async_search(query, postal_code, client=None):
+    return await _async_get(
+        SEARCH_URL,
+        client,
+        params = {
+            'q': query,
+            'postal_code': postal_code,
+        }
+    )
+
+
+async def async_scrape_flyers(items_by_flyer, max_workers=MAX_WORKERS,
+                              client=None, cache=None,
+                              checkpoint_directory=None):
+    # Async generator counterpart of `scrape_flyers`: at most `max_workers`
+    # requests are in flight at once and each flyer is yielded as soon as
+    # it's complete.
+    client = client or get_async_client()
+    semaphore = asyncio.Semaphore(max(1, max_workers))
+    if checkpoint_directory:
+        os.makedirs(checkpoint_directory, exist_ok=True)
+
+    results = {}
+    remaining = {}
+    tasks = []
+
+    async def fetch(flyer_id, i, item_id):
+        async with semaphore:
+            item = await async_scrape_item(item_id, client, cache)
+        await _run_in_executor(_append_checkpoint, checkpoint_directory,
+                               flyer_id, item_id, item)
+        return flyer_id, i, item_id, item
+
+    for flyer_id, item_ids in items_by_flyer.items():
+        results[flyer_id] = [None] * len(item_ids)
+        remaining[flyer_id] = len(item_ids)
+        done = {}
+        if checkpoint_directory:
+            done = _read_checkpoint(_checkpoint_path(checkpoint_directory,
+                                                     flyer_id))
+        for i, item_id in enumerate(item_ids):
+            if item_id in done:
+                results[flyer_id][i] = done[item_id]
+                remaining[flyer_id] -= 1
+            else:
+                tasks.append(asyncio.ensure_future(fetch(flyer_id, i,
+                                                         item_id)))
+
+    try:
+        for flyer_id in [flyer_id for flyer_id, count in remaining.items()
+                         if count == 0]:
+            yield flyer_id, _to_frame(results.pop(flyer_id))
+            _remove_checkpoint(checkpoint_directory, flyer_id)
+
+        # As in `iter_scrape_items`, a failed item doesn't stop the others
+        # from being fetched and checkpointed.
+        error = None
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                flyer_id, i, item_id, item = await next_done
+            except Exception as e:
+                error = error or e
+                continue
+            results[flyer_id][i] = item
+            remaining[flyer_id] -= 1
+            if remaining[flyer_id] == 0:
+                yield flyer_id, _to_frame(results.pop(flyer_id))
+                _remove_checkpoint(checkpoint_directory, flyer_id)
+        if error is not None:
+            raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def async_get_flyers(merchant, postal_code, data_directory,
+                           max_workers=MAX_WORKERS, cache=True, manifest=None,
+                           storage='csv', refresh=False, index=None,
+                           images=False, client=None):
+    return (await async_get_flyers_many(
+        [(merchant, postal_code)], data_directory, max_workers=max_workers,
+        cache=cache, manifest=manifest, storage=storage, refresh=refresh,
+        index=index, images=images, client=client))[(merchant, postal_code)]
+
+
+async def async_get_flyers_many(pairs, data_directory, max_workers=MAX_WORKERS,
+                                cache=True, manifest=None, storage='csv',
+                                refresh=False, index=None, images=False,
+                                client=None):
+    # Opening the cache and index, (re)building the manifest and reading
+    # stored flyers all touch the disk, so keep them off the event loop.
+    cache, writer = await _run_in_executor(_setup, data_directory, cache,
+                                           manifest, storage, index, images)
+    pairs = list(dict.fromkeys(pairs))
+
+    results = await asyncio.gather(*[
+        async_search(merchant, postal_code, client)
+        for merchant, postal_code in pairs])
+
+    plan = await _run_in_executor(_plan_flyers, pairs, results,
+                                  writer.manifest, refresh)
+
+    async for flyer_id, df in async_scrape_flyers(
+            plan.to_scrape, max_workers=max_workers, client=client,
+            cache=cache,
+            checkpoint_directory=_checkpoint_directory(data_directory)):
+        # Saving touches the disk (and may download images) too.
+        await _run_in_executor(_store_flyer, plan, flyer_id, df, writer)
+
+    return plan.results()
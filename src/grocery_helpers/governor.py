@@ -0,0 +1,309 @@
+import asyncio
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from urllib.parse import urlparse
+
+try:
+    import fcntl
+except ImportError:
+    # No advisory file locks (e.g., on Windows): buckets are only shared
+    # between threads of the same process.
+    fcntl = None
+
+
+# Requests per second (and burst size) allowed per host.
+DEFAULT_BUDGETS = {
+    'backflipp.wishabi.com': (20, 40),
+}
+
+# Budget for store sites (i.e., Selenium page loads) that don't have one.
+DEFAULT_STORE_BUDGET = (1, 3)
+
+# HTTP status codes that mean "slow down".
+BACKOFF_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Number of times `RateGovernor.get` retries a request the host asked us to
+# back off from.
+RETRIES = 3
+
+STATE_DIRECTORY = os.path.join(tempfile.gettempdir(),
+                               'grocery_helpers-governor')
+
+
+def host(url):
+    return urlparse(url).netloc or url
+
+
+def new_session(pool_maxsize, pool_connections=4, headers=None):
+    # A requests session with a keep-alive pool of `pool_maxsize`
+    # connections per host.
+    import requests
+
+    session = requests.Session()
+    session.headers.update(headers or {})
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_connections,
+                                            pool_maxsize=pool_maxsize)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class TokenBucket:
+    # Token bucket whose state lives in a small file guarded by an advisory
+    # lock, so every thread and process using the same `state_directory`
+    # draws from one budget.
+
+    def __init__(self, name, rate, burst=None, state_directory=STATE_DIRECTORY):
+        self.rate = float(rate)
+        self.burst = float(burst or rate)
+        self._path = os.path.join(state_directory,
+                                  re.sub(r'[^\w.-]', '_', name) + '.bucket')
+        self._lock = threading.Lock()
+        os.makedirs(state_directory, exist_ok=True)
+
+    def try_acquire(self):
+        # Take a token if one is available and return 0, otherwise return
+        # how many seconds to wait before trying again.
+        with self._lock, open(self._path, 'a+') as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                now = time.time()
+                try:
+                    tokens, timestamp = map(float, f.read().split())
+                except ValueError:
+                    tokens, timestamp = self.burst, now
+                tokens = min(self.burst,
+                             tokens + max(0, now - timestamp) * self.rate)
+                if tokens >= 1:
+                    tokens -= 1
+                    wait = 0
+                else:
+                    wait = (1 - tokens) / self.rate
+                f.seek(0)
+                f.truncate()
+                f.write('%r %r' % (tokens, now))
+                f.flush()
+                return wait
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def acquire(self):
+        while True:
+            wait = self.try_acquire()
+            if wait == 0:
+                return
+            time.sleep(wait)
+
+
+class AdaptiveLimit:
+    # Concurrency limit that grows additively while requests succeed and
+    # halves (at most once per `cooldown` seconds) when the backend pushes
+    # back (AIMD).
+
+    def __init__(self, initial=8, minimum=1, maximum=32, decrease=0.5,
+                 cooldown=1):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._last_decrease = 0
+        self._condition = threading.Condition()
+        # (loop, future) for each coroutine waiting in `acquire_async`.
+        self._async_waiters = []
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    async def acquire_async(self):
+        # `acquire` for coroutines: waits on a future that `release` sets,
+        # instead of blocking the event loop.
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                waiter = (loop, loop.create_future())
+                self._async_waiters.append(waiter)
+            try:
+                await waiter[1]
+            finally:
+                with self._condition:
+                    if waiter in self._async_waiters:
+                        self._async_waiters.remove(waiter)
+
+    def release(self, success=True):
+        with self._condition:
+            self.in_flight -= 1
+            now = time.time()
+            if success:
+                # Roughly +1 per `limit` successful requests.
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            elif now - self._last_decrease > self.cooldown:
+                self.limit = max(self.minimum, self.limit * self.decrease)
+                self._last_decrease = now
+            self._condition.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, future)
+            except RuntimeError:
+                # Its loop has closed.
+                pass
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class Slot:
+    # Handed out by `RateGovernor.request`; report the response status so
+    # the governor can adapt.
+
+    def __init__(self):
+        self.success = True
+
+    def record(self, status_code):
+        self.success = status_code not in BACKOFF_STATUS_CODES
+
+
+class RateGovernor:
+    # Routes outgoing traffic through a per-host token bucket (shared across
+    # processes) and a per-host AIMD concurrency limit (per process).
+
+    def __init__(self, budgets=None, default_budget=None,
+                 state_directory=STATE_DIRECTORY, max_concurrency=32,
+                 initial_concurrency=8):
+        self._budgets = dict(DEFAULT_BUDGETS)
+        self._budgets.update(budgets or {})
+        self._default_budget = default_budget
+        self._state_directory = state_directory
+        self._max_concurrency = max_concurrency
+        self._initial_concurrency = initial_concurrency
+        self._buckets = {}
+        self._limits = {}
+        self._lock = threading.Lock()
+
+    def set_budget(self, host_or_url, rate, burst=None, overwrite=True):
+        name = host(host_or_url)
+        with self._lock:
+            if overwrite or name not in self._budgets:
+                self._budgets[name] = (rate, burst)
+                self._buckets.pop(name, None)
+
+    def bucket(self, url):
+        # None if the host has no rate budget.
+        name = host(url)
+        with self._lock:
+            if name not in self._buckets:
+                budget = self._budgets.get(name, self._default_budget)
+                self._buckets[name] = budget and TokenBucket(
+                    name, *budget, state_directory=self._state_directory)
+            return self._buckets[name]
+
+    def limit(self, url):
+        name = host(url)
+        with self._lock:
+            if name not in self._limits:
+                self._limits[name] = AdaptiveLimit(
+                    initial=min(self._initial_concurrency,
+                                self._max_concurrency),
+                    maximum=self._max_concurrency)
+            return self._limits[name]
+
+    @contextmanager
+    def request(self, url):
+        limit = self.limit(url)
+        bucket = self.bucket(url)
+        limit.acquire()
+        slot = Slot()
+        try:
+            if bucket:
+                bucket.acquire()
+            yield slot
+        except BaseException:
+            slot.success = False
+            raise
+        finally:
+            limit.release(slot.success)
+
+    @asynccontextmanager
+    async def request_async(self, url):
+        # Same as `request`, but waits without blocking the event loop. The
+        # token bucket's file (and its lock) is only touched from the
+        # default executor.
+        loop = asyncio.get_running_loop()
+        limit = self.limit(url)
+        bucket = await loop.run_in_executor(None, self.bucket, url)
+        await limit.acquire_async()
+        slot = Slot()
+        try:
+            while bucket:
+                wait = await loop.run_in_executor(None, bucket.try_acquire)
+                if wait == 0:
+                    break
+                await asyncio.sleep(wait)
+            yield slot
+        except BaseException:
+            slot.success = False
+            raise
+        finally:
+            limit.release(slot.success)
+
+    def get(self, session, url, retries=RETRIES, **kwargs):
+        # `session.get(url, **kwargs)` within the host's budget, retried
+        # with exponential back-off while the host asks us to back off.
+        # Raises `requests.HTTPError` for an error response, so error bodies
+        # never reach callers (or their caches).
+        for attempt in range(retries + 1):
+            with self.request(url) as slot:
+                response = session.get(url, **kwargs)
+                slot.record(response.status_code)
+            if (response.status_code not in BACKOFF_STATUS_CODES or
+                    attempt == retries):
+                break
+            time.sleep(2 ** attempt)
+        response.raise_for_status()
+        return response
+
+    async def get_async(self, client, url, retries=RETRIES, **kwargs):
+        # `get` for an httpx `AsyncClient`.
+        for attempt in range(retries + 1):
+            async with self.request_async(url) as slot:
+                response = await client.get(url, **kwargs)
+                slot.record(response.status_code)
+            if (response.status_code not in BACKOFF_STATUS_CODES or
+                    attempt == retries):
+                break
+            await asyncio.sleep(2 ** attempt)
+        response.raise_for_status()
+        return response
+
+
+_governor = None
+
+
+def get_governor():
+    # Process-wide governor shared by the flyers module and the store APIs.
+    global _governor
+    if _governor is None:
+        _governor = RateGovernor()
+    return _governor
+
+
+def set_governor(governor):
+    global _governor
+    _governor = governor
@@ -0,0 +1,96 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+
+from .governor import get_governor
+
+
+# Flyer columns holding image URLs. Each gets a '<field>_path' column with
+# the image's path relative to the data directory.
+IMAGE_FIELDS = ('cutout_image_url',)
+
+MAX_WORKERS = 16
+
+
+class ImageStore:
+    # Content-addressed image store under '<data>/images': each image is
+    # saved once as 'images/<hash[:2]>/<sha256><ext>', however many URLs
+    # (or flyers) it turns up under, and URLs that were already fetched
+    # are remembered so they cost no requests at all.
+
+    def __init__(self, data_directory):
+        self._data_directory = data_directory
+        self._root = os.path.join(data_directory, 'images')
+        self._lock = threading.Lock()
+        os.makedirs(self._root, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(self._root, 'urls.sqlite'),
+                                   timeout=30, check_same_thread=False)
+        self._db.execute('CREATE TABLE IF NOT EXISTS urls ('
+                         'url TEXT PRIMARY KEY, '
+                         'path TEXT NOT NULL)')
+        self._db.commit()
+
+    def path(self, url):
+        # Path (relative to the data directory) of an already-fetched URL.
+        with self._lock:
+            row = self._db.execute('SELECT path FROM urls WHERE url = ?',
+                                   (url,)).fetchone()
+        if row and os.path.exists(os.path.join(self._data_directory, row[0])):
+            return row[0]
+        return None
+
+    def fetch(self, url, session=None):
+        path = self.path(url)
+        if path:
+            return path
+
+        response = get_governor().get(session or requests, url)
+
+        digest = hashlib.sha256(response.content).hexdigest()
+        ext = os.path.splitext(url.split('?')[0])[1][:5]
+        path = os.path.join('images', digest[:2], digest + ext)
+        full_path = os.path.join(self._data_directory, path)
+        if not os.path.exists(full_path):
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(full_path))
+            with os.fdopen(fd, 'wb') as f:
+                f.write(response.content)
+            os.replace(tmp_path, full_path)
+
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO urls VALUES (?, ?)',
+                             (url, path))
+            self._db.commit()
+        return path
+
+    def download(self, df, fields=IMAGE_FIELDS, max_workers=MAX_WORKERS,
+                 session=None):
+        # Fetch every image referenced by a flyer concurrently and return
+        # the flyer with a '<field>_path' column per image field.
+        fields = [field for field in fields if field in df]
+        urls = pd.unique(pd.concat([df[field] for field in fields])
+                         .dropna()) if fields else []
+        urls = [url for url in urls if isinstance(url, str) and url]
+
+        def fetch(url):
+            try:
+                return url, self.fetch(url, session)
+            except requests.RequestException as e:
+                print("Couldn't download image %s: %s" % (url, e))
+                return url, None
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            paths = dict(executor.map(fetch, urls))
+
+        return df.assign(**{'%s_path' % field: df[field].map(paths)
+                            for field in fields})
+
+    def close(self):
+        with self._lock:
+            self._db.close()
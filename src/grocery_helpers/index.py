@@ -0,0 +1,132 @@
+import datetime
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+from .manifest import Manifest
+from .storage import read_flyer
+
+
+INDEX_FILENAME = 'flyer_index.sqlite'
+
+# Searchable flyer columns; the rest are stored alongside for display.
+TEXT_FIELDS = ('name', 'brand', 'description')
+STORED_FIELDS = ('merchant', 'price', 'pre_price_text', 'post_price_text',
+                 'sale_story')
+
+
+def _date(value):
+    # 'YYYY-MM-DD' from an ISO string or a timestamp.
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return str(value)[:10]
+
+
+def _text(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return str(value)
+
+
+class FlyerIndex:
+    # Full-text (SQLite FTS5) index over the items of every stored flyer.
+
+    def __init__(self, data_directory):
+        self._data_directory = data_directory
+        self._lock = threading.Lock()
+        os.makedirs(data_directory, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(data_directory,
+                                                INDEX_FILENAME),
+                                   timeout=30, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS items USING fts5('
+            '%s, flyer_id UNINDEXED, item_id UNINDEXED, valid_from UNINDEXED, '
+            'valid_to UNINDEXED, %s, '
+            "tokenize='porter unicode61 remove_diacritics 2')" % (
+                ', '.join(TEXT_FIELDS),
+                ', '.join('%s UNINDEXED' % x for x in STORED_FIELDS)))
+        self._db.execute('CREATE TABLE IF NOT EXISTS flyers ('
+                         'flyer_id TEXT PRIMARY KEY, '
+                         'merchant TEXT, '
+                         'valid_from TEXT, '
+                         'valid_to TEXT)')
+        self._db.commit()
+
+    def add_flyer(self, df, flyer_id):
+        # (Re)index one flyer.
+        flyer_id = str(flyer_id)
+        records = df.to_dict('records')
+        rows = [tuple([_text(record.get(x)) for x in TEXT_FIELDS] +
+                      [flyer_id, _text(record.get('id')),
+                       _date(record.get('flyer_valid_from')),
+                       _date(record.get('flyer_valid_to'))] +
+                      [_text(record.get(x)) for x in STORED_FIELDS])
+                for record in records]
+        first = records[0] if records else {}
+
+        with self._lock:
+            self._db.execute('DELETE FROM items WHERE flyer_id = ?',
+                             (flyer_id,))
+            if rows:
+                self._db.executemany('INSERT INTO items VALUES (%s)' %
+                                     ', '.join('?' * len(rows[0])), rows)
+            self._db.execute(
+                'INSERT OR REPLACE INTO flyers VALUES (?, ?, ?, ?)',
+                (flyer_id, _text(first.get('merchant')),
+                 _date(first.get('flyer_valid_from')),
+                 _date(first.get('flyer_valid_to'))))
+            self._db.commit()
+
+    def indexed_flyers(self):
+        with self._lock:
+            return {row[0] for row in
+                    self._db.execute('SELECT flyer_id FROM flyers')}
+
+    def update(self, manifest=None):
+        # Index every flyer in the manifest that isn't indexed yet.
+        manifest = manifest or Manifest(self._data_directory)
+        indexed = self.indexed_flyers()
+        count = 0
+        for record in manifest.records.values():
+            if record['kind'] != 'flyer' or record['id'] in indexed:
+                continue
+            path = manifest.path('flyer', record['id'])
+            if path:
+                self.add_flyer(read_flyer(path), record['id'])
+                count += 1
+        return count
+
+    def find(self, query, valid_on=None, merchant=None, limit=None):
+        # Items matching every word of `query` (stemmed, so 'thigh' also
+        # finds 'thighs'), best matches first. `valid_on` (a date or
+        # 'YYYY-MM-DD') keeps only flyers valid on that day.
+        words = ['"%s"' % word.replace('"', '""') for word in query.split()]
+        if not words:
+            raise ValueError('Empty query')
+        sql = ('SELECT %s, flyer_id, item_id, valid_from, valid_to, %s '
+               'FROM items WHERE items MATCH ?' % (', '.join(TEXT_FIELDS),
+                                                   ', '.join(STORED_FIELDS)))
+        params = [' '.join(words)]
+        if valid_on is not None:
+            if isinstance(valid_on, (datetime.date, datetime.datetime)):
+                valid_on = valid_on.isoformat()
+            sql += ' AND valid_from <= ? AND valid_to >= ?'
+            params += [str(valid_on)[:10]] * 2
+        if merchant is not None:
+            sql += ' AND merchant = ?'
+            params.append(merchant)
+        sql += ' ORDER BY rank'
+        if limit is not None:
+            sql += ' LIMIT %d' % limit
+
+        with self._lock:
+            cursor = self._db.execute(sql, params)
+            columns = [x[0] for x in cursor.description]
+            return pd.DataFrame(cursor.fetchall(), columns=columns)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
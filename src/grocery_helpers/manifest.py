@@ -0,0 +1,249 @@
+import contextlib
+import glob
+import json
+import os
+import re
+import tempfile
+import threading
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: writes are only serialized between threads.
+    fcntl = None
+
+
+MANIFEST_FILENAME = 'manifest.json'
+
+# Held (with flock) while a manifest is read, merged and written back.
+LOCK_FILENAME = '.manifest.lock'
+
+# '<valid to> - <merchant> flyer <flyer id>.csv'
+FLYER_FILENAME_RE = re.compile(r'^(\d{4}-\d{2}-\d{2}) - (.*) flyer (\d+)\.csv$')
+
+# 'flyers/store=<merchant>/valid_until=<valid to>/flyer <flyer id>.parquet'
+PARQUET_FLYER_PATH_RE = re.compile(r'store=(.*)/valid_until=(\d{4}-\d{2}-\d{2})/'
+                                   r'flyer (\d+)\.parquet$')
+
+
+# Kinds whose ids are unique across stores.
+GLOBAL_KINDS = ('flyer',)
+
+
+def _key(kind, id, store=None):
+    if store is None or kind in GLOBAL_KINDS:
+        return '%s/%s' % (kind, id)
+    return '%s/%s/%s' % (kind, store, id)
+
+
+class Manifest:
+    # Index of every artifact written to a data directory (flyers, orders and
+    # products), so checking whether something has already been downloaded
+    # is a dictionary lookup rather than a directory scan.
+    #
+    # Flyer ids are unique across merchants, so flyers are keyed by id alone
+    # and order numbers and SKUs are keyed per store.
+    #
+    # Several instances (threads or processes) can share a data directory:
+    # writes re-read the file under an flock and merge into what's there,
+    # and reads reload it if someone else has written since.
+
+    def __init__(self, data_directory):
+        self._data_directory = data_directory
+        self._path = os.path.join(data_directory, MANIFEST_FILENAME)
+        self._records = None
+        self._stat = None
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+
+    @property
+    def records(self):
+        with self._lock:
+            self._load()
+            return dict(self._records)
+
+    def get(self, kind, id, store=None):
+        with self._lock:
+            self._load()
+            return self._records.get(_key(kind, id, store))
+
+    def path(self, kind, id, store=None):
+        # Absolute path of an artifact, or None if it isn't on disk.
+        record = self.get(kind, id, store)
+        if record is None:
+            return None
+        path = os.path.join(self._data_directory, record['path'])
+        if not os.path.exists(path):
+            return None
+        return path
+
+    def add(self, kind, id, path, store=None, valid_from=None, valid_to=None,
+            rows=None):
+        self.update([self._record(kind, id, path, store, valid_from, valid_to,
+                                  rows)])
+
+    def update(self, records):
+        with self._locked():
+            self._load()
+            for record in records:
+                self._records[_key(record['kind'], record['id'],
+                                   record['store'])] = record
+            self._save()
+
+    def remove(self, kind, id, store=None):
+        with self._locked():
+            self._load()
+            if self._records.pop(_key(kind, id, store), None) is not None:
+                self._save()
+
+    def rebuild(self):
+        # Rescan the data directory and replace the manifest with what's
+        # actually on disk.
+        with self._locked():
+            records = []
+            for store_directory in sorted(glob.glob(
+                    os.path.join(self._data_directory, '*', ''))):
+                store = os.path.basename(os.path.dirname(store_directory))
+                records += self._scan_flyers(store_directory, store)
+                records += self._scan_orders(store_directory, store)
+                records += self._scan_products(store_directory, store)
+            records += self._scan_parquet_flyers()
+            self._records = {}
+            for record in records:
+                self._records[_key(record['kind'], record['id'],
+                                   record['store'])] = record
+            self._save()
+            return len(records)
+
+    def _record(self, kind, id, path, store=None, valid_from=None,
+                valid_to=None, rows=None):
+        return {
+            'kind': kind,
+            'id': str(id),
+            'store': store,
+            'path': os.path.relpath(path, self._data_directory),
+            'valid_from': valid_from,
+            'valid_to': valid_to,
+            'rows': None if rows is None else int(rows),
+        }
+
+    def _scan_flyers(self, store_directory, store):
+        records = []
+        for path in sorted(glob.glob(os.path.join(store_directory, 'flyers',
+                                                  '*.csv'))):
+            match = FLYER_FILENAME_RE.match(os.path.basename(path))
+            if match is None:
+                continue
+            valid_to, merchant, flyer_id = match.groups()
+            df = pd.read_csv(path, usecols=lambda x: x == 'flyer_valid_from')
+            valid_from = None
+            if len(df) and 'flyer_valid_from' in df:
+                valid_from = str(df['flyer_valid_from'].iloc[0])[:10]
+            records.append(self._record('flyer', flyer_id, path, merchant,
+                                        valid_from, valid_to, len(df)))
+        return records
+
+    def _scan_parquet_flyers(self):
+        records = []
+        for path in sorted(glob.glob(os.path.join(self._data_directory,
+                                                  'flyers', '*', '*',
+                                                  '*.parquet'))):
+            match = PARQUET_FLYER_PATH_RE.search(path.replace(os.sep, '/'))
+            if match is None:
+                continue
+            merchant, valid_to, flyer_id = match.groups()
+            df = pd.read_parquet(path, engine='pyarrow',
+                                 columns=['flyer_valid_from'])
+            valid_from = None
+            if len(df):
+                valid_from = str(df['flyer_valid_from'].iloc[0])[:10]
+            records.append(self._record('flyer', flyer_id, path, merchant,
+                                        valid_from, valid_to, len(df)))
+        return records
+
+    def _scan_orders(self, store_directory, store):
+        orders_path = os.path.join(store_directory, 'orders.csv')
+        if not os.path.exists(orders_path):
+            return []
+        df = pd.read_csv(orders_path, index_col=0)
+        records = []
+        for order_number, df_order in df.groupby('orderNumber'):
+            date = str(df_order['date'].iloc[0])
+            records.append(self._record('order', order_number, orders_path,
+                                        store, date, date, len(df_order)))
+        return records
+
+    def _scan_products(self, store_directory, store):
+        products_path = os.path.join(store_directory, 'products',
+                                     'products.csv')
+        if not os.path.exists(products_path):
+            return []
+        df = pd.read_csv(products_path, index_col=0)
+        records = []
+        for sku in df.index:
+            path = os.path.join(store_directory, 'products', str(sku))
+            if not os.path.exists(path):
+                path = products_path
+            records.append(self._record('product', sku, path, store, rows=1))
+        return records
+
+    @contextlib.contextmanager
+    def _locked(self):
+        # Hold the manifest against other threads and processes (reentrant,
+        # as e.g. a first `update` rebuilds the manifest).
+        with self._lock:
+            if fcntl is None or self._lock_depth:
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+            os.makedirs(self._data_directory, exist_ok=True)
+            with open(os.path.join(self._data_directory, LOCK_FILENAME),
+                      'a') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _file_stat(self):
+        try:
+            stat = os.stat(self._path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        # (Re)read the manifest if it has changed on disk since we last did,
+        # e.g. because another instance has added to it.
+        stat = self._file_stat()
+        if self._records is not None and stat == self._stat:
+            return
+        if stat is not None:
+            with open(self._path) as f:
+                self._records = json.load(f)
+            self._stat = stat
+        else:
+            # First use of an existing data directory: index what's there.
+            self.rebuild()
+
+    def _save(self):
+        # Write to a temporary file and rename it over the manifest, so
+        # readers never see a partially written file.
+        os.makedirs(self._data_directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self._data_directory,
+                                        prefix='.manifest-', suffix='.json')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self._records, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self._path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self._stat = self._file_stat()
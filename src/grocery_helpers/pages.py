@@ -0,0 +1,102 @@
+import json
+from urllib.parse import urljoin
+
+from .governor import get_governor, new_session
+
+
+# Fetch store pages over plain HTTP and read them with the same
+# `extract.Field` specs the browser uses, parsed with selectolax (the
+# `html` extra) instead of a browser.
+
+# Keep-alive connections kept per store site.
+POOL_SIZE = 16
+
+HEADERS = {
+    'User-Agent': ('Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 '
+                   '(KHTML, like Gecko) Chrome/86.0.4240.75 Safari/537.36'),
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-CA,en;q=0.9',
+}
+
+# Attributes whose values are URLs; a browser resolves them, so we do too.
+URL_ATTRIBUTES = ('href', 'src')
+
+_session = None
+
+
+class RenderingRequired(Exception):
+    # The page's HTML doesn't have what we're after until a browser has run
+    # its scripts.
+    pass
+
+
+def get_session():
+    # Share one keep-alive session (and its connection pool) between calls,
+    # threads and store API instances.
+    global _session
+    if _session is None:
+        _session = new_session(pool_maxsize=POOL_SIZE, pool_connections=8,
+                               headers=HEADERS)
+    return _session
+
+
+def fetch(url, timeout=10, session=None, governor=None):
+    # Every request to a store site goes through the shared rate governor.
+    session = session or get_session()
+    governor = governor or get_governor()
+    return governor.get(session, url, timeout=timeout).text
+
+
+def parse(html, fields, base_url=None):
+    # Read `fields` (a dict of name -> `extract.Field`) off a page's HTML,
+    # the way `extract.extract` reads them off a live page.
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(html)
+    return {name: _get(tree, field, base_url) for name, field in fields.items()}
+
+
+def _select(root, selector):
+    # Like `querySelectorAll`: selectolax also matches the node it's
+    # called on, which the browser never does.
+    return [node for node in root.css(selector) if node != root]
+
+
+def _get(root, field, base_url):
+    if field.selector is None:
+        nodes = [root]
+    else:
+        nodes = _select(root, field.selector)
+        if not field.many:
+            nodes = nodes[:1]
+    values = [_value(node, field, base_url) for node in nodes]
+    if field.many:
+        return values
+    return values[0] if values else None
+
+
+def _value(node, field, base_url):
+    if field.fields:
+        return {name: _get(node, subfield, base_url)
+                for name, subfield in field.fields.items()}
+    if field.attr is None:
+        # Close enough to innerText for inline elements.
+        value = ' '.join(node.text().split())
+    elif field.attr in ('innerHTML', 'textContent'):
+        value = node.text()
+    else:
+        value = node.attributes.get(field.attr)
+        if field.attr in URL_ATTRIBUTES and value is not None and base_url:
+            value = urljoin(base_url, value)
+    if field.json and value is not None:
+        value = json.loads(value)
+    return value
+
+
+def fetch_page(url, fields, ready, timeout=10, session=None, governor=None):
+    # Fetch and parse a page, or raise `RenderingRequired` if `ready(page)`
+    # says it needs a browser.
+    page = parse(fetch(url, timeout, session, governor), fields, url)
+    if not ready(page):
+        raise RenderingRequired(url)
+    return page
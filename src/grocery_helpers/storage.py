@@ -0,0 +1,195 @@
+import os
+import warnings
+
+import pandas as pd
+
+from .manifest import Manifest
+
+
+# Timestamp columns in Flipp items.
+DATETIME_FIELDS = ('valid_from', 'valid_to', 'flyer_valid_from',
+                   'flyer_valid_to', 'available_from', 'available_to')
+
+# Zone every timestamp column is converted to, so flyers from either side of
+# a DST change share one dtype, and whose local dates name flyer files.
+TIMEZONE = 'America/Toronto'
+
+
+def parse_datetimes(df):
+    # Convert the timestamp columns of a flyer to datetime64 in `TIMEZONE`,
+    # one vectorized parse per column. Naive timestamps are taken to be in
+    # `TIMEZONE` already.
+    columns = {}
+    for field in DATETIME_FIELDS:
+        if field not in df:
+            continue
+        column = df[field]
+        if not pd.api.types.is_datetime64_any_dtype(column):
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                column = pd.to_datetime(column, errors='coerce', utc=True)
+        if column.dt.tz is None:
+            column = column.dt.tz_localize(TIMEZONE, ambiguous='NaT',
+                                           nonexistent='NaT')
+        columns[field] = column.dt.tz_convert(TIMEZONE)
+    return df.assign(**columns)
+
+
+class CSVStorage:
+    # One CSV per flyer under '<data>/<merchant>/flyers'.
+    name = 'csv'
+
+    def __init__(self, data_directory):
+        self._data_directory = data_directory
+
+    def flyer_path(self, merchant, flyer_id, valid_to):
+        return os.path.join(self._data_directory, merchant, 'flyers',
+                            '%s - %s flyer %s.csv' % (valid_to, merchant,
+                                                      flyer_id))
+
+    def write(self, df, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        df.to_csv(path)
+
+    def read(self, path):
+        return parse_datetimes(pd.read_csv(path, index_col=0))
+
+
+# Columns `ParquetStorage` partitions the flyer dataset by.
+PARTITION_KEYS = ('store', 'valid_until')
+
+
+class ParquetStorage:
+    # One Parquet file per flyer in a dataset under '<data>/flyers',
+    # partitioned by merchant and valid-to date:
+    #
+    #     flyers/store=<merchant>/valid_until=<date>/flyer <flyer id>.parquet
+    #
+    # The partition keys are named so they don't collide with the `merchant`
+    # and `valid_to` columns Flipp already returns. Requires pyarrow.
+    name = 'parquet'
+
+    def __init__(self, data_directory):
+        self._data_directory = data_directory
+
+    @property
+    def dataset_path(self):
+        return os.path.join(self._data_directory, 'flyers')
+
+    def flyer_path(self, merchant, flyer_id, valid_to):
+        return os.path.join(self.dataset_path, 'store=%s' % merchant,
+                            'valid_until=%s' % valid_to,
+                            'flyer %s.parquet' % flyer_id)
+
+    def write(self, df, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write beside the final path and rename, so a dataset scan never
+        # picks up a partial file.
+        tmp_path = os.path.join(os.path.dirname(path),
+                                '.' + os.path.basename(path))
+        df.to_parquet(tmp_path, engine='pyarrow')
+        os.replace(tmp_path, path)
+
+    def read(self, path):
+        return parse_datetimes(pd.read_parquet(path, engine='pyarrow'))
+
+    def load(self, columns=None, filters=None):
+        # Read every stored flyer as one frame, e.g.
+        #
+        #     load(columns=['name', 'price'],
+        #          filters=[('store', '=', 'Zehrs'),
+        #                   ('valid_until', '>=', '2020-06-01')])
+        df = pd.read_parquet(self.dataset_path, engine='pyarrow',
+                             columns=columns, filters=filters,
+                             schema=self.schema())
+        # Partition keys come back as strings given a schema; keep them
+        # categorical, as pyarrow would otherwise read them.
+        keys = [key for key in PARTITION_KEYS if key in df]
+        return parse_datetimes(df.astype({key: 'category' for key in keys}))
+
+    def schema(self):
+        # One schema for every flyer in the dataset. Flipp's columns vary
+        # between flyers (e.g., `sale_story` is all null in some and text in
+        # others, prices are ints in some and floats in others), and pyarrow
+        # otherwise reads every file with the first file's schema.
+        # Timestamps are read in `TIMEZONE`, whatever offset older files were
+        # written with.
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+
+        dataset = ds.dataset(self.dataset_path, format='parquet',
+                             partitioning='hive')
+        schemas = [pq.read_schema(path) for path in dataset.files]
+        schemas = [pa.schema([_in_timezone(field) for field in schema],
+                             metadata=schema.metadata) for schema in schemas]
+        return pa.unify_schemas(schemas + [dataset.partitioning.schema],
+                                promote_options='permissive')
+
+
+def _in_timezone(field):
+    import pyarrow as pa
+
+    if pa.types.is_timestamp(field.type) and field.type.tz is not None:
+        return field.with_type(pa.timestamp(field.type.unit, TIMEZONE))
+    return field
+
+
+STORAGE_BACKENDS = {
+    CSVStorage.name: CSVStorage,
+    ParquetStorage.name: ParquetStorage,
+}
+
+
+def get_storage(storage, data_directory):
+    # `storage` may be a backend name or an existing backend instance.
+    if isinstance(storage, str):
+        try:
+            return STORAGE_BACKENDS[storage](data_directory)
+        except KeyError:
+            raise ValueError('Unknown storage backend %r (choose from %s)' %
+                             (storage, ', '.join(STORAGE_BACKENDS)))
+    return storage
+
+
+def read_flyer(path):
+    if path.endswith('.parquet'):
+        return parse_datetimes(pd.read_parquet(path, engine='pyarrow'))
+    return parse_datetimes(pd.read_csv(path, index_col=0))
+
+
+def load_flyers(data_directory, columns=None, filters=None):
+    return ParquetStorage(data_directory).load(columns=columns,
+                                               filters=filters)
+
+
+def compact_flyers(data_directory, remove_csv=False, manifest=None):
+    # Convert every CSV flyer in the manifest into the Parquet layout and
+    # point the manifest at the new files.
+    manifest = manifest or Manifest(data_directory)
+    storage = ParquetStorage(data_directory)
+
+    records = []
+    for record in manifest.records.values():
+        if record['kind'] != 'flyer' or not record['path'].endswith('.csv'):
+            continue
+        csv_path = os.path.join(data_directory, record['path'])
+        if not os.path.exists(csv_path):
+            continue
+
+        df = parse_datetimes(pd.read_csv(csv_path, index_col=0))
+        path = storage.flyer_path(record['store'], record['id'],
+                                  record['valid_to'])
+        storage.write(df, path)
+        print('Compacted flyer %s for %s' % (record['id'], record['store']))
+
+        record = dict(record, path=os.path.relpath(path, data_directory),
+                      rows=len(df))
+        records.append((record, csv_path))
+
+    manifest.update([record for record, csv_path in records])
+
+    if remove_csv:
+        for record, csv_path in records:
+            os.remove(csv_path)
+    return len(records)
@@ -0,0 +1,85 @@
+from selenium.common.exceptions import (NoSuchElementException,
+                                        ElementClickInterceptedException,
+                                        ElementNotInteractableException,
+                                        StaleElementReferenceException,
+                                        TimeoutException)
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+
+# How often a wait re-checks its condition (seconds).
+POLL_FREQUENCY = 0.1
+
+# Errors that just mean "the page isn't ready yet" while a condition runs.
+IGNORED_EXCEPTIONS = (NoSuchElementException,
+                      ElementClickInterceptedException,
+                      ElementNotInteractableException,
+                      StaleElementReferenceException)
+
+
+class Timeout(Exception):
+    pass
+
+
+def _locator(locator):
+    # A bare string is a class name, anything else a `(By.*, value)` pair.
+    if isinstance(locator, str):
+        return By.CLASS_NAME, locator
+    return locator
+
+
+def wait_for(driver, condition, timeout=10, message=None):
+    # Call `condition(driver)` until it returns something truthy and return
+    # that, or raise `Timeout` after `timeout` seconds.
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=POLL_FREQUENCY,
+                             ignored_exceptions=IGNORED_EXCEPTIONS
+                             ).until(condition)
+    except TimeoutException:
+        raise Timeout(message or 'Page not ready after %s s' % timeout)
+
+
+def element(locator):
+    # The first matching element, once there is one.
+    by, value = _locator(locator)
+    return lambda driver: driver.find_element(by, value)
+
+
+def elements(locator):
+    # Every matching element, once there is at least one.
+    by, value = _locator(locator)
+    return lambda driver: driver.find_elements(by, value) or False
+
+
+def texts(locator):
+    # The text of every matching element, once they all have some.
+    by, value = _locator(locator)
+
+    def condition(driver):
+        text = [x.text for x in driver.find_elements(by, value)]
+        return text if len(text) and all(text) else False
+    return condition
+
+
+def click(locator):
+    # Click the first matching element, as soon as it takes the click.
+    by, value = _locator(locator)
+
+    def condition(driver):
+        driver.find_element(by, value).click()
+        return True
+    return condition
+
+
+def any_of(**conditions):
+    # The first condition to be met, as a `(name, result)` pair.
+    def condition(driver):
+        for name, check in conditions.items():
+            try:
+                result = check(driver)
+            except IGNORED_EXCEPTIONS:
+                continue
+            if result:
+                return name, result
+        return False
+    return condition
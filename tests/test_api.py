@@ -0,0 +1,30 @@
+import pytest
+
+pytest.importorskip('selenium')
+
+from grocery_helpers.api import order_details_loaded, parse_unit_price
+
+
+@pytest.mark.parametrize('quantity, expected', [
+    ('2 @ $3.49 ea', (3.49, 'ea')),
+    ('1.21 kg @ $1.26 /kg', (1.26, 'kg')),
+    ('2', (None, None)),
+])
+def test_parse_unit_price(quantity, expected):
+    assert parse_unit_price(quantity) == expected
+
+
+def _page(descriptions, skus, quantities, prices):
+    return {'descriptions': descriptions, 'skus': skus,
+            'quantities': quantities, 'prices': prices}
+
+
+def test_order_details_loaded():
+    assert order_details_loaded(_page(['Milk'], ['20658152_EA'],
+                                      ['1 @ $4.99 ea'], ['$4.99']))
+    assert not order_details_loaded(_page([], [], [], []))
+    # Prices not rendered yet.
+    assert not order_details_loaded(_page(['Milk', 'Eggs'],
+                                          ['20658152_EA', '20812144_EA'],
+                                          ['1 @ $4.99 ea', '1 @ $3.29 ea'],
+                                          ['$4.99']))
@@ -0,0 +1,57 @@
+import base64
+import json
+
+import pytest
+
+pytest.importorskip('selenium')
+
+from grocery_helpers.capture import Api, NetworkCapture
+
+
+class FakeDriver:
+    # Replays DevTools performance-log events for JSON responses.
+
+    def __init__(self, responses):
+        self._responses = responses
+        self._log = []
+        for request_id, (url, body) in enumerate(responses.items()):
+            self._event('Network.responseReceived', requestId=request_id,
+                        type='XHR', response={'url': url,
+                                              'mimeType': 'application/json'})
+            self._event('Network.loadingFinished', requestId=request_id)
+
+    def _event(self, method, **params):
+        self._log.append({'message': json.dumps(
+            {'message': {'method': method, 'params': params}})})
+
+    def execute_cdp_cmd(self, command, args):
+        if command == 'Network.getResponseBody':
+            return list(self._responses.values())[args['requestId']]
+        return {}
+
+    def get_log(self, kind):
+        log, self._log = self._log, []
+        return log
+
+
+def test_json_skips_bodies_that_arent_json():
+    driver = FakeDriver({
+        'https://store/api/orders': {'body': '{"orders": [{"code": 1}]}'},
+        'https://store/api/orders?page=2': {'body': ''},
+        'https://store/api/orders?page=3': {'body': '{"orders": [',
+                                            'base64Encoded': False},
+        'https://store/api/orders?page=4': {
+            'body': base64.b64encode(b'\xff\xfe').decode(),
+            'base64Encoded': True},
+    })
+    capture = NetworkCapture(driver)
+    assert capture.json(r'/orders') == [{'orders': [{'code': 1}]}]
+
+
+def test_api_frame():
+    api = Api(r'/orders', records='orders', columns={'number': 'code',
+                                                     'total': 'total.value'})
+    df = api.frame([{'orders': [{'code': 1, 'total': {'value': 2.5}}]}])
+    assert df.to_dict('records') == [{'number': 1, 'total': 2.5}]
+    with pytest.raises(KeyError):
+        api.frame([{'orders': [{'code': 1}]}])
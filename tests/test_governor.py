@@ -0,0 +1,60 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from grocery_helpers import governor
+from grocery_helpers.governor import AdaptiveLimit, RateGovernor
+
+
+def test_acquire_async_waits_for_release():
+    limit = AdaptiveLimit(initial=1, maximum=1)
+
+    async def main():
+        await limit.acquire_async()
+        waiter = asyncio.ensure_future(limit.acquire_async())
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+        # Released from another thread, as a sync caller would.
+        threading.Thread(target=limit.release).start()
+        await asyncio.wait_for(waiter, 1)
+        assert limit.in_flight == 1
+
+    asyncio.run(main())
+
+
+@pytest.mark.skipif(governor.fcntl is None, reason='needs flock')
+def test_request_async_doesnt_block_the_loop_on_the_bucket(tmp_path):
+    rate_governor = RateGovernor(default_budget=(100, 100),
+                                 state_directory=str(tmp_path))
+    bucket = rate_governor.bucket('http://store')
+
+    async def main():
+        # Another process holding the bucket's file for a while.
+        with open(bucket._path, 'a+') as f:
+            governor.fcntl.flock(f, governor.fcntl.LOCK_EX)
+            request = asyncio.ensure_future(tick_while(
+                rate_governor.request_async('http://store')))
+            await asyncio.sleep(0.2)
+            governor.fcntl.flock(f, governor.fcntl.LOCK_UN)
+        return await request
+
+    async def tick_while(context):
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        task = asyncio.ensure_future(ticker())
+        async with context:
+            pass
+        task.cancel()
+        return ticks
+
+    start = time.perf_counter()
+    ticks = asyncio.run(main())
+    assert time.perf_counter() - start >= 0.2
+    assert ticks >= 5
@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+
+
+SRC_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'src')
+
+# Cold-start budget for the flyer CLI (seconds). It needs requests and
+# pandas, which take about 0.7 s on a laptop; Selenium would add more.
+DOWNLOAD_FLYERS_BUDGET = 1.5
+
+# Modules only the store APIs need.
+BROWSER_MODULES = ('selenium', 'selectolax')
+
+
+def _python(*args):
+    # Run a fresh interpreter against the source tree and return its
+    # stdout and stderr.
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [SRC_DIRECTORY] + [path for path in [env.get('PYTHONPATH')] if path])
+    result = subprocess.run([sys.executable] + list(args), env=env,
+                            capture_output=True, text=True, check=True)
+    return result.stdout, result.stderr
+
+
+def _imported(module):
+    # Top-level packages loaded by importing `module`.
+    stdout, stderr = _python('-c', 'import sys, %s; print(" ".join(sorted('
+                             '{name.split(".")[0] for name in sys.modules})))'
+                             % module)
+    return set(stdout.split())
+
+
+def _import_seconds(module):
+    # Cumulative import time of `module`, as `-X importtime` reports it.
+    stdout, stderr = _python('-X', 'importtime', '-c', 'import ' + module)
+    for line in reversed(stderr.splitlines()):
+        fields = [field.strip() for field in line.split('|')]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1e6
+    raise AssertionError('No import time for %s in:\n%s' % (module, stderr))
+
+
+def test_package_imports_nothing_heavy():
+    modules = _imported('grocery_helpers')
+    assert not modules & {'selenium', 'selectolax', 'pandas', 'numpy'}
+
+
+def test_download_flyers_skips_selenium():
+    modules = _imported('grocery_helpers.bin.download_flyers')
+    assert not modules & set(BROWSER_MODULES)
+
+
+def test_download_flyers_import_budget():
+    seconds = min(_import_seconds('grocery_helpers.bin.download_flyers')
+                  for i in range(3))
+    assert seconds < DOWNLOAD_FLYERS_BUDGET, (
+        'Importing grocery_helpers.bin.download_flyers took %.2f s (budget '
+        '%.2f s)' % (seconds, DOWNLOAD_FLYERS_BUDGET))
@@ -0,0 +1,50 @@
+import pytest
+
+pytest.importorskip('selectolax')
+
+from grocery_helpers.api import GroceryHelpersAPI
+from grocery_helpers.extract import Field
+from grocery_helpers.pages import parse
+
+
+BASE_URL = 'https://www.realcanadiansuperstore.ca/search?search-bar=milk'
+
+# One search result tile, shaped like the store's markup.
+SEARCH_HTML = '''
+<html><body>
+<ul class="product-tile-group__list">
+  <li class="product-tile-group__list__item">
+    <div class="product-tracking"
+         data-track-products-array='[{"productSKU": "20658152_EA"}]'></div>
+    <span class="product-tile__eyebrow">Previously Purchased</span>
+    <a class="product-tile__details__info__name__link"
+       href="/Milk/p/20658152_EA">Milk</a>
+    <ul class="comparison-price-list">
+      <li><span>$1.10</span><span>$1.10</span><span>/ 1L</span></li>
+    </ul>
+  </li>
+</ul>
+</body></html>
+'''
+
+
+def test_parse_search_page_matches_browser():
+    # What the browser's `extract.extract` returns for the same page.
+    page = parse(SEARCH_HTML, GroceryHelpersAPI.SEARCH_PAGE, BASE_URL)
+    assert page == {
+        'items': [{
+            'product': [{'productSKU': '20658152_EA'}],
+            'eyebrow': 'Previously Purchased',
+            'link': 'https://www.realcanadiansuperstore.ca/Milk/p/20658152_EA',
+            'unitPrices': [{'spans': ['$1.10', '$1.10', '/ 1L']}],
+        }],
+        'noResults': None,
+    }
+
+
+def test_parse_never_matches_the_parent():
+    html = '<div class="a"><div class="a">inner</div></div>'
+    page = parse(html, {'outer': Field('.a', many=True, fields={
+        'inner': Field('.a', many=True),
+    })})
+    assert page == {'outer': [{'inner': ['inner']}, {'inner': []}]}
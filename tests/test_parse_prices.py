@@ -0,0 +1,59 @@
+import math
+
+import pandas as pd
+import pytest
+
+from grocery_helpers.flyers import parse_prices
+
+
+# (pre_price_text, price, post_price_text, sale_story) ->
+# (price_value, multi_buy_quantity, unit_price, price_basis, price_per_kg,
+#  savings)
+CASES = [
+    # Plain price each.
+    (('', '4.99', '', ''), (4.99, 1, 4.99, 'each', math.nan, math.nan)),
+    # Cents, in the price or after it.
+    (('', '99¢', '', ''), (0.99, 1, 0.99, 'each', math.nan, math.nan)),
+    (('', '79', '¢', ''), (0.79, 1, 0.79, 'each', math.nan, math.nan)),
+    # Multi-buys.
+    (('2/', '5', '', ''), (5.0, 2, 2.5, 'each', math.nan, math.nan)),
+    (('3 FOR', '10', '', ''), (10.0, 3, 10 / 3, 'each', math.nan, math.nan)),
+    # A multi-buy only spelled out in the sale story.
+    (('', '', '', '2 FOR $7'), (7.0, 2, 3.5, 'each', math.nan, math.nan)),
+    # Prices per weight.
+    (('', '1.99', '/100 g', ''), (1.99, 1, 1.99, '100g', 19.9, math.nan)),
+    (('', '3.99', '/kg', ''), (3.99, 1, 3.99, 'kg', 3.99, math.nan)),
+    (('', '2.00', '/lb', ''), (2.0, 1, 2.0, 'lb', 2 * 2.20462, math.nan)),
+    # An explicit $/kg wins over the converted /lb price.
+    (('', '3.99', '/lb 8.80/kg', ''), (3.99, 1, 3.99, 'lb', 8.80, math.nan)),
+    # Savings in dollars and cents.
+    (('', '4.99', '', 'SAVE $1.50'), (4.99, 1, 4.99, 'each', math.nan, 1.5)),
+    (('', '1.49', '', 'SAVE 50¢'), (1.49, 1, 1.49, 'each', math.nan, 0.5)),
+    (('', '5.99', '', 'Save up to $3'),
+     (5.99, 1, 5.99, 'each', math.nan, 3.0)),
+]
+
+COLUMNS = ['price_value', 'multi_buy_quantity', 'unit_price', 'price_basis',
+           'price_per_kg', 'savings']
+
+
+@pytest.mark.parametrize('fields, expected', CASES)
+def test_parse_prices(fields, expected):
+    df = parse_prices(pd.DataFrame([fields], columns=[
+        'pre_price_text', 'price', 'post_price_text', 'sale_story']))
+    row = df.iloc[0]
+    for column, value in zip(COLUMNS, expected):
+        if isinstance(value, str):
+            assert row[column] == value, column
+        elif math.isnan(value):
+            assert pd.isna(row[column]), column
+        else:
+            assert row[column] == pytest.approx(value), column
+
+
+def test_parse_prices_missing_columns():
+    df = parse_prices(pd.DataFrame({'price': ['1.25', None]}))
+    assert df['price_value'].iloc[0] == 1.25
+    assert pd.isna(df['price_value'].iloc[1])
+    assert df['multi_buy_quantity'].tolist() == [1, 1]
+    assert df['price_basis'].tolist() == ['each', 'each']
@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+from grocery_helpers.storage import (ParquetStorage, load_flyers,
+                                     parse_datetimes, TIMEZONE)
+
+
+def _flyer(name, valid_from, valid_to):
+    return parse_datetimes(pd.DataFrame({
+        'name': [name],
+        'merchant': ['Zehrs'],
+        'flyer_valid_from': [valid_from],
+        'flyer_valid_to': [valid_to],
+    }))
+
+
+# A summer (EDT) and a winter (EST) flyer, as Flipp dates them.
+SUMMER = ('2020-07-01T00:00:00-04:00', '2020-07-07T23:59:59-04:00')
+WINTER = ('2020-12-01T00:00:00-05:00', '2020-12-07T23:59:59-05:00')
+
+
+def test_parse_datetimes_uses_one_zone():
+    summer = _flyer('a', *SUMMER)
+    winter = _flyer('b', *WINTER)
+    assert summer['flyer_valid_from'].dtype == winter['flyer_valid_from'].dtype
+    assert str(summer['flyer_valid_from'].dt.tz) == TIMEZONE
+    assert summer['flyer_valid_from'].iloc[0].date().isoformat() == (
+        '2020-07-01')
+    df = pd.concat([summer, winter], ignore_index=True)
+    assert pd.api.types.is_datetime64_any_dtype(df['flyer_valid_from'])
+
+
+def test_load_flyers_across_dst_change(tmp_path):
+    pytest.importorskip('pyarrow')
+    storage = ParquetStorage(str(tmp_path))
+    for flyer_id, (valid_from, valid_to) in enumerate([SUMMER, WINTER]):
+        df = _flyer('item %d' % flyer_id, valid_from, valid_to)
+        storage.write(df, storage.flyer_path('Zehrs', flyer_id,
+                                             valid_to[:10]))
+
+    df = load_flyers(str(tmp_path)).sort_values('flyer_valid_from')
+    assert df['name'].tolist() == ['item 0', 'item 1']
+    assert str(df['flyer_valid_from'].dt.tz) == TIMEZONE
+    assert df['flyer_valid_from'].dt.strftime('%Y-%m-%d').tolist() == [
+        '2020-07-01', '2020-12-01']
+
+    winter = df[df['flyer_valid_from'] >= pd.Timestamp('2020-11-01',
+                                                       tz=TIMEZONE)]
+    assert winter['name'].tolist() == ['item 1']